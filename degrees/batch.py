@@ -0,0 +1,130 @@
+import json
+import multiprocessing
+import sys
+
+import degrees
+from graph import walk
+
+
+def main():
+    if not 2 <= len(sys.argv) <= 4:
+        sys.exit("Usage: python batch.py directory [pairs] [processes]")
+    directory = sys.argv[1]
+    pairs = sys.argv[2] if len(sys.argv) >= 3 else "-"
+    processes = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    degrees.load_data(directory, compact=True)
+
+    if pairs == "-":
+        queries = read_queries(sys.stdin)
+    else:
+        with open(pairs, encoding="utf-8") as f:
+            queries = read_queries(f)
+
+    for result in run_batch(queries, directory, processes):
+        print(json.dumps(result))
+
+
+def read_queries(lines):
+    """
+    Returns (source name, target name) pairs from tab-separated lines,
+    skipping blank ones.
+    """
+    queries = []
+    for line in lines:
+        line = line.rstrip("\n")
+        if line.strip():
+            source, _, target = line.partition("\t")
+            queries.append((source.strip(), target.strip()))
+    return queries
+
+
+def resolve(name):
+    """
+    Returns the person index for `name`, or an error message
+    if there is no such person or the name is ambiguous.
+    """
+    people = degrees.graph.people_for_name(name)
+    if len(people) == 0:
+        return None, "Person not found."
+    if len(people) > 1:
+        return None, "Ambiguous name."
+    return people[0], None
+
+
+def run_batch(queries, directory, processes=None):
+    """
+    Yields one result dictionary per query, in order.
+
+    Queries are grouped by source, so each group costs one BFS tree, and
+    the groups are spread over a process pool. Where processes are forked,
+    the workers share the already loaded graph copy-on-write.
+    """
+    results = [None] * len(queries)
+    groups = {}
+    for i, (source_name, target_name) in enumerate(queries):
+        result = {"source": source_name, "target": target_name}
+        source, error = resolve(source_name)
+        if error is None:
+            target, error = resolve(target_name)
+        if error is not None:
+            result["error"] = error
+        else:
+            groups.setdefault(source, []).append((i, target))
+        results[i] = result
+
+    pool = multiprocessing.Pool(
+        processes, initializer=degrees.load_once, initargs=(directory,)
+    )
+    with pool:
+        answered = pool.imap_unordered(answer_group, groups.items(), chunksize=16)
+
+        # Emit results in input order as soon as everything before them is done
+        emitted = 0
+        for group in answered:
+            for i, path in group:
+                results[i]["path"] = path
+            while emitted < len(results) and is_done(results[emitted]):
+                yield finish(results[emitted])
+                emitted += 1
+        while emitted < len(results):
+            yield finish(results[emitted])
+            emitted += 1
+
+
+def answer_group(group):
+    """
+    Returns (query index, path) pairs for queries that share a source,
+    all read off a single BFS tree.
+    """
+    graph = degrees.graph
+    source, queries = group
+    parents = graph.search_tree(source, [target for _, target in queries])
+
+    answers = []
+    for i, target in queries:
+        if target in parents:
+            path = [(graph.movie_ids[movie], graph.person_ids[person])
+                    for movie, person in walk(parents, target)]
+        else:
+            path = None
+        answers.append((i, path))
+    return answers
+
+
+def is_done(result):
+    return "error" in result or "path" in result
+
+
+def finish(result):
+    """
+    Fill in the degrees of separation for a completed result.
+    """
+    if "error" not in result:
+        path = result["path"]
+        result["degrees"] = None if path is None else len(path)
+    return result
+
+
+if __name__ == "__main__":
+    main()
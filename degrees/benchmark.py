@@ -0,0 +1,353 @@
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import degrees
+from nameindex import NameIndex
+from snapshot import FILENAME
+from util import Node, StackFrontier, QueueFrontier
+
+BENCHMARKS = {}
+
+
+def benchmark(function):
+    """
+    Register `function` as a benchmark runnable from the command line.
+    """
+    BENCHMARKS[function.__name__] = function
+    return function
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        sys.exit(f"Usage: python benchmark.py {{{','.join(BENCHMARKS)}}} [args]")
+    BENCHMARKS[sys.argv[1]](*sys.argv[2:])
+
+
+def unload():
+    """
+    Drops any loaded data so the next load starts from scratch.
+    """
+    degrees.graph = None
+    degrees.names, degrees.people, degrees.movies = {}, {}, {}
+
+
+def random_pairs(count, seed=0):
+    """
+    Returns `count` random pairs of distinct person_ids.
+    """
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    return [tuple(rng.sample(person_ids, 2)) for _ in range(count)]
+
+
+def explore(source, target):
+    """
+    Runs a one-sided BFS from `source` until `target` is reached, and
+    returns the target node together with both the set of explored
+    nodes the old reconstruction needed and the new parent map.
+    """
+    parents = {source: None}
+    explored = {Node(source, None, None)}
+    frontier = QueueFrontier()
+    frontier.add(Node(source, None, None))
+    while not frontier.empty():
+        current_node = frontier.remove()
+        for movie_id, person_id in degrees.neighbors_for_person(current_node.state):
+            if person_id in parents:
+                continue
+            parents[person_id] = (movie_id, current_node.state)
+            node = Node(person_id, current_node.state, movie_id)
+            if person_id == target:
+                return node, explored, parents
+            explored.add(node)
+            frontier.add(node)
+    return None
+
+
+def legacy_build_path(final_node, explored, source):
+    path = []
+    parent_node = final_node
+    while parent_node.state != source:
+        path.insert(0, (parent_node.action, parent_node.state))
+        parent_node = legacy_find_parent(parent_node, explored)
+    return path
+
+
+def legacy_find_parent(node, explored):
+    for n in explored:
+        if node.parent == n.state:
+            explored.remove(n)
+            return n
+    return None
+
+
+@benchmark
+def reconstruct(directory="large", queries="50"):
+    """
+    Compares the cost of rebuilding paths by scanning the explored set
+    against following the parent map.
+    """
+    degrees.load_data(directory)
+
+    legacy = parent_map = 0
+    hops = 0
+    for source, target in random_pairs(int(queries)):
+        result = explore(source, target)
+        if result is None:
+            continue
+        node, explored, parents = result
+
+        start = time.perf_counter()
+        old = legacy_build_path(node, set(explored), source)
+        legacy += time.perf_counter() - start
+
+        start = time.perf_counter()
+        new = degrees.build_path(parents, target)
+        parent_map += time.perf_counter() - start
+
+        assert old == new
+        hops += len(new)
+
+    print(f"Reconstructed {hops} hops")
+    print(f"  explored scan: {legacy * 1000:.2f} ms")
+    print(f"  parent map:    {parent_map * 1000:.2f} ms")
+
+
+class LegacyStackFrontier():
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        node = self.frontier[-1]
+        self.frontier = self.frontier[:-1]
+        return node
+
+
+class LegacyQueueFrontier(LegacyStackFrontier):
+
+    def remove(self):
+        node = self.frontier[0]
+        self.frontier = self.frontier[1:]
+        return node
+
+
+def time_frontier(frontier_class, size, probes):
+    """
+    Returns the seconds spent filling a frontier of `size` nodes,
+    probing it `probes` times, and draining it.
+    """
+    nodes = [Node(i, None, None) for i in range(size)]
+    frontier = frontier_class()
+
+    start = time.perf_counter()
+    for node in nodes:
+        frontier.add(node)
+    added = time.perf_counter()
+    for state in range(0, size, max(size // probes, 1)):
+        frontier.contains_state(state)
+    probed = time.perf_counter()
+    while not frontier.empty():
+        frontier.remove()
+    removed = time.perf_counter()
+
+    return added - start, probed - added, removed - probed
+
+
+@benchmark
+def frontier(size="1000000", probes="1000", legacy_size="20000"):
+    """
+    Times add, contains_state and remove on frontiers of `size` nodes.
+    The list-based frontiers are quadratic, so they run on `legacy_size`.
+    """
+    cases = [
+        (StackFrontier, int(size)),
+        (QueueFrontier, int(size)),
+        (LegacyStackFrontier, int(legacy_size)),
+        (LegacyQueueFrontier, int(legacy_size)),
+    ]
+    for frontier_class, n in cases:
+        add, probe, remove = time_frontier(frontier_class, n, int(probes))
+        print(f"{frontier_class.__name__} (n = {n})")
+        print(f"  add:            {add:.3f} s")
+        print(f"  contains_state: {probe:.3f} s")
+        print(f"  remove:         {remove:.3f} s")
+
+
+@benchmark
+def load(directory="large"):
+    """
+    Compares load time and memory of the dictionary loader
+    against the compact graph loader, both parsing the CSV files.
+    Snapshot loads are timed by `startup`.
+    """
+    for compact in (False, True):
+        unload()
+        start = time.perf_counter()
+        degrees.load_data(directory, compact=compact, cache=False)
+        elapsed = time.perf_counter() - start
+
+        unload()
+        tracemalloc.start()
+        degrees.load_data(directory, compact=compact, cache=False)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        unload()
+
+        print("compact graph" if compact else "dictionaries")
+        print(f"  load time: {elapsed:.2f} s")
+        print(f"  memory:    {current / 2 ** 20:.1f} MiB (peak {peak / 2 ** 20:.1f} MiB)")
+
+
+@benchmark
+def startup(directory="large"):
+    """
+    Compares a cold load that parses the CSV files and writes a snapshot
+    against a warm load that memory-maps that snapshot.
+    """
+    snapshot = os.path.join(directory, FILENAME)
+    if os.path.exists(snapshot):
+        os.remove(snapshot)
+
+    for label in ("cold", "warm"):
+        unload()
+        start = time.perf_counter()
+        degrees.load_data(directory, compact=True)
+        print(f"{label}: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+@benchmark
+def neighbors(directory="large", queries="100", *caps):
+    """
+    Runs the same searches on the dictionary data with no neighbor cache
+    and with caches of each of the given sizes in MiB.
+    """
+    unload()
+    degrees.load_data(directory)
+    pairs = random_pairs(int(queries))
+
+    for cap in [None] + [float(cap) for cap in caps or ("16", "256")]:
+        degrees.cache_neighbors(None if cap is None else int(cap * 2 ** 20))
+        start = time.perf_counter()
+        for source, target in pairs:
+            degrees.bidirectional_path(source, target)
+        elapsed = time.perf_counter() - start
+
+        cache = degrees.neighbor_cache
+        if cache is None:
+            print("no cache")
+        else:
+            print(f"cache of {cap:g} MiB")
+            print(f"  hits: {cache.hits}, misses: {cache.misses}, "
+                  f"evictions: {cache.evictions}")
+        print(f"  search time: {elapsed:.2f} s")
+    degrees.cache_neighbors(None)
+
+
+def misspell(name, rng):
+    """
+    Returns `name` with one character dropped, doubled or swapped.
+    """
+    i = rng.randrange(len(name) - 1)
+    edit = rng.choice(("drop", "double", "swap"))
+    if edit == "drop":
+        return name[:i] + name[i + 1:]
+    if edit == "double":
+        return name[:i] + name[i] + name[i:]
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+
+def random_names(count, rng):
+    """
+    Returns `count` random names, each a first and last name made of
+    random syllables.
+    """
+    onsets = ("b c d f g h j k l m n p r s t v w z br ch cl dr fr gr kr pl "
+              "sh st th tr sch qu y x").split()
+    vowels = "a e i o u y ai ea ie ou oo ee au ei".split()
+    codas = [""] * 3 + "n r s l m t k nd rt st ck ng ll ss x ff tz".split()
+
+    def word():
+        return "".join(
+            rng.choice(onsets) + rng.choice(vowels) + rng.choice(codas)
+            for _ in range(rng.randint(1, 3))
+        ).capitalize()
+
+    firsts = [word() for _ in range(max(count // 50, 1))]
+    lasts = [word() for _ in range(max(count // 5, 1))]
+    return [f"{rng.choice(firsts)} {rng.choice(lasts)}" for _ in range(count)]
+
+
+def time_lookups(lookup, sample, lookups):
+    """
+    Times `lookup` on each of `lookups` and prints the mean, median and
+    p99 latencies and the share of candidate lists that include the
+    name in `sample` it was made from.
+    """
+    latencies = []
+    found = 0
+    for name, text in zip(sample, lookups):
+        start = time.perf_counter()
+        candidates = lookup(text)
+        latencies.append(time.perf_counter() - start)
+        found += any(candidate["name"] == name for candidate in candidates)
+    latencies.sort()
+    print(f"  mean:   {sum(latencies) / len(latencies) * 1000:.3f} ms")
+    print(f"  p50:    {latencies[len(latencies) // 2] * 1000:.3f} ms")
+    print(f"  p99:    {latencies[len(latencies) * 99 // 100] * 1000:.3f} ms")
+    print(f"  recall: {found / len(latencies):.1%}")
+
+
+@benchmark
+def names(directory="large", queries="1000", synthetic="1000000"):
+    """
+    Times building the name index, then exact, prefix and
+    misspelled lookups of random names, with the share of lookups
+    whose candidates include the name. Misspelled lookups are then
+    repeated on an index of `synthetic` random names.
+    """
+    unload()
+    degrees.load_data(directory, compact=True)
+    rng = random.Random(0)
+    sample = [
+        degrees.graph.person_names[rng.randrange(len(degrees.graph.person_ids))]
+        for _ in range(int(queries))
+    ]
+    sample = [name for name in sample if len(name) > 3]
+
+    start = time.perf_counter()
+    degrees.find_people("")
+    print(f"index build: {time.perf_counter() - start:.2f} s")
+
+    cases = {
+        "exact": sample,
+        "prefix": [name[:len(name) // 2] for name in sample],
+        "misspelled": [misspell(name, rng) for name in sample],
+    }
+    for label, lookups in cases.items():
+        print(f"{label} (n = {len(lookups)})")
+        time_lookups(degrees.find_people, sample, lookups)
+
+    all_names = random_names(int(synthetic), rng)
+    start = time.perf_counter()
+    index = NameIndex(list(range(len(all_names))), all_names, [None] * len(all_names))
+    print(f"synthetic index build ({len(all_names)} names): "
+          f"{time.perf_counter() - start:.2f} s")
+    sample = [rng.choice(all_names) for _ in range(int(queries))]
+    print(f"synthetic misspelled (n = {len(sample)})")
+    time_lookups(index.lookup, sample, [misspell(name, rng) for name in sample])
+
+
+if __name__ == "__main__":
+    main()
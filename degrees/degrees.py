@@ -1,7 +1,12 @@
 import csv
+import re
 import sys
+import time
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import load_graph, PeopleView, MoviesView, NamesView
+from nameindex import NameIndex
+from snapshot import load_snapshot, save_snapshot
+from util import Node, StackFrontier, QueueFrontier, LRUCache
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +17,54 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact graph backing the views above, when loaded with compact=True
+graph = None
 
-def load_data(directory):
+# LRU cache of neighbors_for_person results, when enabled with cache_neighbors
+neighbor_cache = None
+
+# Prefix and trigram index over names, built on first use by find_people
+name_index = None
+
+# Approximate size of one cached (movie_id, person_id) pair
+PAIR_SIZE = sys.getsizeof((None, None))
+
+
+def load_data(directory, compact=False, cache=True, progress=None):
     """
     Load data from CSV files into memory.
+
+    With `compact`, the data is kept in an integer-indexed Graph and
+    `names`, `people` and `movies` become read-only views over it.
+    Unless `cache` is False, the compact graph is memory-mapped from a
+    snapshot in `directory`, which is written after the CSV files are
+    parsed and rewritten whenever they change.
+
+    If given, `progress` is called as `progress(stage, rows, rejected,
+    seconds)` as the CSV files are parsed, where `rejected` maps reasons
+    rows were skipped to their counts.
     """
+    global graph, names, people, movies, name_index
+    if neighbor_cache is not None:
+        neighbor_cache.clear()
+    name_index = None
+    if compact:
+        graph = load_snapshot(directory) if cache else None
+        if graph is None:
+            graph = load_graph(directory, progress)
+            if cache:
+                try:
+                    save_snapshot(graph, directory)
+                except OSError:
+                    pass
+        names = NamesView(graph)
+        people = PeopleView(graph)
+        movies = MoviesView(graph)
+        return
+    if graph is not None:
+        graph = None
+        names, people, movies = {}, {}, {}
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -42,14 +90,37 @@ def load_data(directory):
             }
 
     # Load stars
+    start = time.perf_counter()
+    rows = rejected = 0
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
+            rows += 1
             try:
                 people[row["person_id"]]["movies"].add(row["movie_id"])
                 movies[row["movie_id"]]["stars"].add(row["person_id"])
             except KeyError:
-                pass
+                rejected += 1
+    if progress is not None:
+        progress("stars", rows, {"unknown id": rejected}, time.perf_counter() - start)
+
+
+def report_progress(stage, rows, rejected, seconds):
+    """
+    Print loading progress to stderr, keeping stdout for the results.
+    """
+    skipped = ", ".join(f"{count} {reason}" for reason, count in rejected.items() if count)
+    print(f"  {stage}: {rows} rows in {seconds:.1f} s ({rows / max(seconds, 1e-9):.0f} rows/s)"
+          + (f", rejected {skipped}" if skipped else ""), file=sys.stderr)
+
+
+def load_once(directory):
+    """
+    Load the compact graph unless it is already loaded, such as in a
+    worker process forked after the parent loaded it.
+    """
+    if graph is None:
+        load_data(directory, compact=True)
 
 
 def main():
@@ -59,7 +130,7 @@ def main():
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact=True, progress=report_progress)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,7 +140,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = bidirectional_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -84,69 +155,181 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
-    If no possible path, returns None.
+    If `stats` is a dict, the number of people expanded is stored
+    under "expanded". If no possible path, returns None.
     """
-    path = []
-    source_node = Node(source, None, None)
-    explored = {source_node}
-    explored_stars = {source}
+    if graph is not None:
+        return compact_search(graph.shortest_path, source, target, stats)
+    if stats is not None:
+        stats["expanded"] = 0
+
+    if source == target:
+        return []
+
+    # Maps person_id to the (movie_id, person_id) step it was reached by
+    parents = {source: None}
 
     frontier = QueueFrontier()
-    frontier.add(source_node)
+    frontier.add(Node(source, None, None))
 
     while not frontier.empty():
         current_node = frontier.remove()
-        trash = neighbors_for_person(current_node.state)
-        for neighbor in neighbors_for_person(current_node.state):
-            neighbor_node = Node(neighbor[1], current_node.state, neighbor[0])
+        if stats is not None:
+            stats["expanded"] += 1
+        for movie_id, person_id in neighbors_for_person(current_node.state):
+            if person_id in parents:
+                continue
+            parents[person_id] = (movie_id, current_node.state)
+            neighbor_node = Node(person_id, current_node.state, movie_id)
             if check_target(neighbor_node, target):
-                path = build_path(neighbor_node, explored, source)
-                return path
-            else:
-                if neighbor_node.state not in explored_stars:
-                    frontier.add(neighbor_node)
-                    explored.add(neighbor_node)
-                    explored_stars.add(neighbor[1])
+                return build_path(parents, target)
+            frontier.add(neighbor_node)
 
     # If no path found
     return None
 
 
-def build_path(final_node, explored, source):
+def bidirectional_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, growing one BFS frontier
+    from each end and stopping as soon as the two meet.
+
+    If `stats` is a dict, the number of people expanded is stored
+    under "expanded". If no possible path, returns None.
+    """
+    if graph is not None:
+        return compact_search(graph.bidirectional_path, source, target, stats)
+    expanded = 0
+    if source == target:
+        path = []
+    else:
+        path = None
+
+        # Maps person_id to the (movie_id, person_id) step towards each end
+        forward = {source: None}
+        backward = {target: None}
+        forward_level = [source]
+        backward_level = [target]
+
+        while path is None and forward_level and backward_level:
+
+            # Always grow the smaller frontier by one full level
+            if len(forward_level) > len(backward_level):
+                forward, backward = backward, forward
+                forward_level, backward_level = backward_level, forward_level
+                swapped = True
+            else:
+                swapped = False
+
+            meeting = None
+            next_level = []
+            for person_id in forward_level:
+                expanded += 1
+                for movie_id, neighbor in neighbors_for_person(person_id):
+                    if neighbor in forward:
+                        continue
+                    forward[neighbor] = (movie_id, person_id)
+                    next_level.append(neighbor)
+                    if meeting is None and neighbor in backward:
+                        meeting = neighbor
+            forward_level = next_level
+
+            if swapped:
+                forward, backward = backward, forward
+                forward_level, backward_level = backward_level, forward_level
+
+            if meeting is not None:
+                path = join_paths(forward, backward, meeting)
+
+    if stats is not None:
+        stats["expanded"] = expanded
+    return path
+
+
+def compact_search(search, source, target, stats):
+    """
+    Runs `search` on the compact graph and returns its path
+    as (movie_id, person_id) pairs.
+    """
+    path = search(graph.person_index[source], graph.person_index[target], stats)
+    if path is None:
+        return None
+    return [(graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path]
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Returns the path through `meeting` given the parent maps
+    grown from the source (`forward`) and from the target (`backward`).
+    """
     path = []
-    parent_node = final_node
-    while parent_node.state != source:
-        path.insert(0, (parent_node.action, parent_node.state))
-        parent_node = find_parent(parent_node, explored)
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, child = backward[person_id]
+        path.append((movie_id, child))
+        person_id = child
     return path
 
 
-def find_parent(node, explored):
-    for n in explored:
-        if node.parent == n.state:
-            explored.remove(n)
-            return n
-    return None
+def build_path(parents, target):
+    """
+    Returns the path to `target` by following the `parents` map
+    back to the source, in time proportional to the path length.
+    """
+    path = []
+    person_id = target
+    while parents[person_id] is not None:
+        movie_id, parent = parents[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+    return path
 
 
 def check_target(node, target):
     return True if node.state == target else False
 
 
-def person_id_for_name(name):
+def person_id_for_name(name, interactive=True):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    A birth year in parentheses, as in "Kevin Bacon (1958)", picks among
+    people sharing a name. Otherwise ambiguities are resolved by asking,
+    unless `interactive` is False, in which case None is returned and
+    find_people can list the candidates.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    birth = None
+    match = re.fullmatch(r"(.*?)\s*\((\d+)\)", name.strip())
+    if match is not None and match.group(1).lower() in names:
+        name, birth = match.groups()
+
+    person_ids = sorted(names.get(name.lower(), set()))
+    if birth is not None:
+        person_ids = [
+            person_id for person_id in person_ids
+            if people[person_id]["birth"] == birth
+        ]
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
+        if not interactive:
+            return None
         print(f"Which '{name}'?")
         for person_id in person_ids:
             person = people[person_id]
@@ -164,11 +347,80 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def find_people(name, limit=10):
+    """
+    Returns up to `limit` ranked candidates for a possibly partial or
+    misspelled name, as dictionaries of id, name, birth and score.
+    """
+    global name_index
+    if name_index is None:
+        if graph is not None:
+            name_index = NameIndex(
+                graph.person_ids, graph.person_names, graph.person_births
+            )
+        else:
+            person_ids = list(people)
+            name_index = NameIndex(
+                person_ids,
+                [people[person_id]["name"] for person_id in person_ids],
+                [people[person_id]["birth"] for person_id in person_ids],
+            )
+    return name_index.lookup(name, limit)
+
+
+def cache_neighbors(max_bytes, precompute=False):
+    """
+    Cache the results of neighbors_for_person in an LRU cache holding
+    roughly `max_bytes` of neighbor sets, or disable caching if
+    `max_bytes` is None. With `precompute`, the cache is filled up front
+    with as many people as fit.
+
+    The cache's `hits`, `misses` and `evictions` counters can be used
+    to tune `max_bytes`.
+    """
+    global neighbor_cache
+    if max_bytes is None:
+        neighbor_cache = None
+        return
+    neighbor_cache = LRUCache(max_bytes, size=neighbors_size)
+    if precompute:
+        for person_id in people:
+            neighbors = frozenset(find_neighbors(person_id))
+            if neighbor_cache.used + neighbors_size(neighbors) > max_bytes:
+                break
+            neighbor_cache.put(person_id, neighbors)
+
+
+def neighbors_size(neighbors):
+    """
+    Returns the approximate memory held by a cached set of neighbors.
+    The ids themselves are shared with the loaded data and not counted.
+    """
+    return sys.getsizeof(neighbors) + len(neighbors) * PAIR_SIZE
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if neighbor_cache is None:
+        return find_neighbors(person_id)
+    neighbors = neighbor_cache.get(person_id)
+    if neighbors is None:
+        neighbors = frozenset(find_neighbors(person_id))
+        neighbor_cache.put(person_id, neighbors)
+    return neighbors
+
+
+def find_neighbors(person_id):
+    """
+    Returns (movie_id, person_id) pairs for people
+    who starred with a given person, without consulting the cache.
+    """
+    if graph is not None:
+        return {(graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in graph.neighbors(graph.person_index[person_id])}
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
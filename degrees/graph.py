@@ -0,0 +1,480 @@
+import csv
+import time
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from itertools import islice
+
+# Rows of stars.csv processed between progress reports
+CHUNK_ROWS = 100000
+
+
+class Graph():
+    """
+    Compact star graph for the degrees dataset.
+
+    Person and movie ids are interned into dense integer indices, and the
+    bipartite graph between them is stored twice in CSR form: for person
+    `p`, `person_movies[person_offsets[p]:person_offsets[p + 1]]` holds the
+    indices of their movies, and likewise `movie_stars` for each movie.
+    """
+
+    def __init__(self):
+        self.person_ids = []
+        self.person_names = []
+        self.person_births = []
+        self.person_index = {}
+
+        self.movie_ids = []
+        self.movie_titles = []
+        self.movie_years = []
+        self.movie_index = {}
+
+        # Maps lowercase names to a person index, or a tuple of them
+        self.name_index = {}
+
+        self.person_offsets = array("i", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("i", [0])
+        self.movie_stars = array("i")
+
+    def add_person(self, person_id, name, birth):
+        index = len(self.person_ids)
+        self.person_index[person_id] = index
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+
+        key = name.lower()
+        other = self.name_index.get(key)
+        if other is None:
+            self.name_index[key] = index
+        elif isinstance(other, tuple):
+            self.name_index[key] = other + (index,)
+        else:
+            self.name_index[key] = (other, index)
+        return index
+
+    def add_movie(self, movie_id, title, year):
+        index = len(self.movie_ids)
+        self.movie_index[movie_id] = index
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+        return index
+
+    def set_stars(self, star_people, star_movies):
+        """
+        Build both CSR adjacencies from parallel arrays of
+        (person index, movie index) star pairs.
+        """
+        self.person_offsets, self.person_movies = compress(
+            star_people, star_movies, len(self.person_ids)
+        )
+        self.movie_offsets, self.movie_stars = compress(
+            star_movies, star_people, len(self.movie_ids)
+        )
+
+    def people_for_name(self, name):
+        """
+        Returns a tuple of person indices with the given name.
+        """
+        found = self.name_index.get(name.lower(), ())
+        return found if isinstance(found, tuple) else (found,)
+
+    def movies_for_person(self, person):
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def stars_for_movie(self, movie):
+        return self.movie_stars[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def neighbors(self, person):
+        """
+        Returns (movie, person) index pairs for people
+        who starred with a given person.
+        """
+        neighbors = set()
+        for movie in self.movies_for_person(person):
+            for star in self.stars_for_movie(movie):
+                neighbors.add((movie, star))
+        return neighbors
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie, person) index pairs that
+        connect the source to the target, using a one-sided BFS.
+        """
+        expanded = 0
+        path = None
+        parents = {source: None}
+        frontier = deque([source])
+        if source == target:
+            path = []
+
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        while path is None and frontier:
+            person = frontier.popleft()
+            expanded += 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if star in parents:
+                        continue
+                    parents[star] = (movie, person)
+                    frontier.append(star)
+                    if star == target:
+                        path = walk(parents, target)
+                        break
+                if path is not None:
+                    break
+
+        if stats is not None:
+            stats["expanded"] = expanded
+        return path
+
+    def search_tree(self, source, targets):
+        """
+        Runs a BFS from `source` until every person in `targets` has been
+        reached, or the component is exhausted, and returns the parent map
+        of (movie, person) steps. Paths to each target can then be read
+        off the same tree with `walk`.
+        """
+        remaining = set(targets)
+        remaining.discard(source)
+        parents = {source: None}
+        frontier = deque([source])
+
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        while remaining and frontier:
+            person = frontier.popleft()
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if star not in parents:
+                        parents[star] = (movie, person)
+                        frontier.append(star)
+                        remaining.discard(star)
+        return parents
+
+    def distance_counts(self, source):
+        """
+        Runs a full BFS from `source` and returns a list whose entry `d`
+        is the number of people exactly `d` degrees away from it.
+        Each movie's cast is only scanned once.
+        """
+        seen_people = bytearray(len(self.person_ids))
+        seen_movies = bytearray(len(self.movie_ids))
+        seen_people[source] = 1
+        counts = [1]
+        level = [source]
+
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        while True:
+            next_level = []
+            for person in level:
+                for i in range(person_offsets[person], person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    if seen_movies[movie]:
+                        continue
+                    seen_movies[movie] = 1
+                    for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                        star = movie_stars[j]
+                        if not seen_people[star]:
+                            seen_people[star] = 1
+                            next_level.append(star)
+            if not next_level:
+                return counts
+            counts.append(len(next_level))
+            level = next_level
+
+    def component_sizes(self):
+        """
+        Returns the number of people in each connected component,
+        largest first.
+        """
+        seen_people = bytearray(len(self.person_ids))
+        seen_movies = bytearray(len(self.movie_ids))
+        sizes = []
+
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        for root in range(len(self.person_ids)):
+            if seen_people[root]:
+                continue
+            seen_people[root] = 1
+            size = 0
+            stack = [root]
+            while stack:
+                person = stack.pop()
+                size += 1
+                for i in range(person_offsets[person], person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    if seen_movies[movie]:
+                        continue
+                    seen_movies[movie] = 1
+                    for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                        star = movie_stars[j]
+                        if not seen_people[star]:
+                            seen_people[star] = 1
+                            stack.append(star)
+            sizes.append(size)
+
+        sizes.sort(reverse=True)
+        return sizes
+
+    def bidirectional_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie, person) index pairs that
+        connect the source to the target, growing one BFS frontier from
+        each end until they meet.
+        """
+        expanded = 0
+        path = [] if source == target else None
+        forward = {source: None}
+        backward = {target: None}
+        forward_level = [source]
+        backward_level = [target]
+
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        while path is None and forward_level and backward_level:
+
+            # Always grow the smaller frontier by one full level
+            swapped = len(forward_level) > len(backward_level)
+            if swapped:
+                forward, backward = backward, forward
+                forward_level, backward_level = backward_level, forward_level
+
+            meeting = None
+            next_level = []
+            for person in forward_level:
+                expanded += 1
+                for i in range(person_offsets[person], person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                        star = movie_stars[j]
+                        if star in forward:
+                            continue
+                        forward[star] = (movie, person)
+                        next_level.append(star)
+                        if meeting is None and star in backward:
+                            meeting = star
+            forward_level = next_level
+
+            if swapped:
+                forward, backward = backward, forward
+                forward_level, backward_level = backward_level, forward_level
+
+            if meeting is not None:
+                path = walk(forward, meeting)
+                person = meeting
+                while backward[person] is not None:
+                    movie, child = backward[person]
+                    path.append((movie, child))
+                    person = child
+
+        if stats is not None:
+            stats["expanded"] = expanded
+        return path
+
+
+def walk(parents, person):
+    """
+    Returns the path to `person` by following the `parents` map
+    back to the root of the search.
+    """
+    path = []
+    while parents[person] is not None:
+        movie, parent = parents[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+    return path
+
+
+def compress(rows, columns, size):
+    """
+    Returns CSR (offsets, indices) arrays for `size` rows
+    from parallel arrays of row and column indices.
+    """
+    offsets = array("i", bytes(4 * (size + 1)))
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    position = array("i", offsets[:size])
+    indices = array("i", bytes(4 * len(rows)))
+    for row, column in zip(rows, columns):
+        indices[position[row]] = column
+        position[row] += 1
+    return offsets, indices
+
+
+def read_table(path, fields):
+    """
+    Returns the columns of a CSV file whose rows should have `fields`
+    values, and the number of malformed rows that were skipped.
+    """
+    columns = [[] for _ in range(fields)]
+    malformed = 0
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) != fields:
+                malformed += 1
+                continue
+            for column, value in zip(columns, row):
+                column.append(value)
+    return columns, malformed
+
+
+def load_graph(directory, progress=None):
+    """
+    Load data from CSV files into a compact Graph.
+
+    `people.csv` and `movies.csv` are read whole, and `stars.csv` is
+    streamed in chunks of CHUNK_ROWS rows. Rows that are malformed or
+    refer to unknown ids are skipped and counted. If given, `progress`
+    is called as `progress(stage, rows, rejected, seconds)` after each
+    table and each chunk of stars, where `rejected` maps reasons to row
+    counts and `seconds` is the time since the stage began.
+    """
+    graph = Graph()
+    start = time.perf_counter()
+    people, malformed = read_table(f"{directory}/people.csv", 3)
+    for person_id, name, birth in zip(*people):
+        graph.add_person(person_id, name, birth)
+    if progress is not None:
+        progress("people", len(graph.person_ids), {"malformed": malformed},
+                 time.perf_counter() - start)
+
+    start = time.perf_counter()
+    movies, malformed = read_table(f"{directory}/movies.csv", 3)
+    for movie_id, title, year in zip(*movies):
+        graph.add_movie(movie_id, title, year)
+    if progress is not None:
+        progress("movies", len(graph.movie_ids), {"malformed": malformed},
+                 time.perf_counter() - start)
+
+    start = time.perf_counter()
+
+    star_people = array("i")
+    star_movies = array("i")
+    rejected = {"malformed": 0, "unknown person": 0, "unknown movie": 0}
+    rows = 0
+    with open(f"{directory}/stars.csv", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        person_index, movie_index = graph.person_index, graph.movie_index
+        while True:
+            chunk = list(islice(reader, CHUNK_ROWS))
+            if not chunk:
+                break
+            rows += len(chunk)
+            for row in chunk:
+                if len(row) != 2:
+                    rejected["malformed"] += 1
+                    continue
+                person = person_index.get(row[0])
+                movie = movie_index.get(row[1])
+                if person is None:
+                    rejected["unknown person"] += 1
+                elif movie is None:
+                    rejected["unknown movie"] += 1
+                else:
+                    star_people.append(person)
+                    star_movies.append(movie)
+            if progress is not None:
+                progress("stars", rows, rejected, time.perf_counter() - start)
+    graph.set_stars(star_people, star_movies)
+
+    return graph
+
+
+class PeopleView(Mapping):
+    """
+    Read-only view of a Graph shaped like the `people` dictionary.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index[person_id]
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[m] for m in graph.movies_for_person(person)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+    def __contains__(self, person_id):
+        return person_id in self.graph.person_index
+
+
+class MoviesView(Mapping):
+    """
+    Read-only view of a Graph shaped like the `movies` dictionary.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index[movie_id]
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[p] for p in graph.stars_for_movie(movie)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+    def __contains__(self, movie_id):
+        return movie_id in self.graph.movie_index
+
+
+class NamesView(Mapping):
+    """
+    Read-only view of a Graph shaped like the `names` dictionary.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        graph = self.graph
+        if name not in graph.name_index:
+            raise KeyError(name)
+        return {graph.person_ids[p] for p in graph.people_for_name(name)}
+
+    def __iter__(self):
+        return iter(self.graph.name_index)
+
+    def __len__(self):
+        return len(self.graph.name_index)
+
+    def __contains__(self, name):
+        return name in self.graph.name_index
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import random
+import sys
+import time
+from urllib.parse import urlencode
+
+import degrees
+from server import percentile
+
+
+def main():
+    if not 2 <= len(sys.argv) <= 5:
+        sys.exit("Usage: python loadgen.py directory [port] [requests] [concurrency]")
+    directory = sys.argv[1]
+    port = int(sys.argv[2]) if len(sys.argv) >= 3 else 8050
+    requests = int(sys.argv[3]) if len(sys.argv) >= 4 else 1000
+    concurrency = int(sys.argv[4]) if len(sys.argv) == 5 else 16
+
+    # Only the names are needed, to build random queries
+    degrees.load_data(directory, compact=True)
+    names = degrees.graph.person_names
+    targets = [
+        "/path?" + urlencode({
+            "source": names[random.randrange(len(names))],
+            "target": names[random.randrange(len(names))],
+        })
+        for _ in range(requests)
+    ]
+
+    asyncio.run(run(port, targets, concurrency))
+
+
+async def run(port, targets, concurrency):
+    """
+    Send GET requests for `targets` over `concurrency` keep-alive
+    connections, then print client-side and server-side latencies.
+    """
+    queue = asyncio.Queue()
+    for target in targets:
+        queue.put_nowait(target)
+    latencies = []
+    statuses = {}
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(port, queue, latencies, statuses) for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{len(latencies)} requests in {elapsed:.2f} s "
+          f"({len(latencies) / elapsed:.0f} requests/s)")
+    print(f"  status codes: {statuses}")
+    print(f"  p50: {percentile(latencies, 50) * 1000:.2f} ms")
+    print(f"  p99: {percentile(latencies, 99) * 1000:.2f} ms")
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    _, metrics = await get(reader, writer, "/metrics")
+    writer.close()
+    print(f"Server metrics: {json.dumps(metrics, indent=2)}")
+
+
+async def client(port, queue, latencies, statuses):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    while not queue.empty():
+        target = queue.get_nowait()
+        start = time.perf_counter()
+        status, _ = await get(reader, writer, target)
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+    writer.close()
+
+
+async def get(reader, writer, target):
+    """
+    Send one GET request and return its status code and decoded JSON body.
+    """
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        header, _, value = line.decode("latin-1").partition(":")
+        if header.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+if __name__ == "__main__":
+    main()
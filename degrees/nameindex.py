@@ -0,0 +1,158 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from heapq import nlargest
+
+# Most prefix matches scored per lookup
+CANDIDATES = 32
+
+# A misspelling drops, doubles or swaps one letter, so it changes a
+# name's length by at most EDITS and at most CHANGED of its trigrams
+EDITS = 1
+CHANGED = 4
+
+# Posting lists counted per fuzzy lookup beyond CHANGED, which is the
+# fewest of them a name within one misspelling of the query is in
+SHARED = 3
+
+# Posting entries hold a key's length above its id, which takes the
+# low KEY_BITS bits, so lengths are capped at MAX_LENGTH
+KEY_BITS = 25
+MAX_LENGTH = 127
+
+
+class NameIndex():
+    """
+    Prefix and trigram index over people's names.
+
+    Names are lowercased and deduplicated into sorted `keys`, so prefix
+    lookups are a binary search. Every trigram of a key maps to entries
+    for the keys containing it, ordered by length, so fuzzy lookups read
+    only the keys of about the query's length. `sizes` holds the number
+    of distinct trigrams of each key.
+    """
+
+    def __init__(self, person_ids, person_names, person_births):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+
+        people = {}
+        for person, name in enumerate(person_names):
+            people.setdefault(name.lower(), []).append(person)
+        self.keys = sorted(people)
+        self.people = [tuple(people[key]) for key in self.keys]
+
+        self.trigrams = {}
+        self.sizes = array("H", bytes(2 * len(self.keys)))
+        typecode = "I" if len(self.keys) < 1 << KEY_BITS else "q"
+        by_length = sorted(range(len(self.keys)), key=lambda key_id: len(self.keys[key_id]))
+        for key_id in by_length:
+            key = self.keys[key_id]
+            key_trigrams = trigrams(key)
+            self.sizes[key_id] = min(len(key_trigrams), 0xFFFF)
+            entry = min(len(key), MAX_LENGTH) << KEY_BITS | key_id
+            for trigram in key_trigrams:
+                postings = self.trigrams.get(trigram)
+                if postings is None:
+                    postings = self.trigrams[trigram] = array(typecode)
+                postings.append(entry)
+
+    def prefix(self, text, limit=10):
+        """
+        Returns up to `limit` key ids of names starting with `text`.
+        """
+        text = text.lower()
+        found = []
+        i = bisect_left(self.keys, text)
+        while i < len(self.keys) and len(found) < limit and self.keys[i].startswith(text):
+            found.append(i)
+            i += 1
+        return found
+
+    def fuzzy(self, text, limit=10):
+        """
+        Returns up to `limit` (similarity, key id) pairs for the names
+        most similar to `text`, best first, where similarity is the
+        Dice coefficient of their trigram sets.
+
+        Only names within EDITS letters of the length of `text` are
+        considered, and every name within one misspelling of `text` is
+        among them. Such a name lacks at most CHANGED of the query's
+        trigrams, so it is in at least SHARED of the CHANGED + SHARED
+        rarest posting lists, and only those are counted.
+        """
+        text = text.lower()
+        query = trigrams(text)
+        length = min(len(text), MAX_LENGTH)
+        low = max(length - EDITS, 0) << KEY_BITS
+        high = (length + EDITS + 1) << KEY_BITS
+
+        postings = []
+        for trigram in query:
+            posting = self.trigrams.get(trigram)
+            if posting is not None:
+                postings.append(posting[bisect_left(posting, low):bisect_left(posting, high)])
+            else:
+                postings.append(())
+        postings.sort(key=len)
+        counted = postings[:CHANGED + SHARED]
+        needed = max(len(counted) - CHANGED, 1)
+
+        counts = Counter()
+        for posting in counted:
+            counts.update(posting)
+        mask = (1 << KEY_BITS) - 1
+        scored = (
+            (self.similarity(query, entry & mask), entry & mask)
+            for entry, count in counts.items() if count >= needed
+        )
+        return nlargest(limit, scored, key=lambda pair: (pair[0], -pair[1]))
+
+    def similarity(self, query, key_id):
+        """
+        Returns the Dice coefficient of the `query` trigram set and
+        the trigram set of a key.
+        """
+        padded = f"  {self.keys[key_id]} "
+        shared = sum(map(padded.__contains__, query))
+        return 2 * shared / (len(query) + self.sizes[key_id])
+
+    def lookup(self, text, limit=10):
+        """
+        Returns up to `limit` ranked candidates for `text` as dictionaries
+        of id, name, birth and score. Exact matches score 1, and fuzzy
+        matches and names starting with `text` are ranked together by
+        similarity, where a prefix is not penalized for the trigram
+        marking the end of `text`.
+        """
+        key = text.lower()
+        ranked = {}
+        for score, key_id in self.fuzzy(key, limit):
+            ranked[key_id] = score
+        start = trigrams(key, whole=False)
+        for key_id in self.prefix(key, CANDIDATES):
+            ranked[key_id] = max(ranked.get(key_id, 0), self.similarity(start, key_id))
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            ranked[i] = 1.0
+
+        candidates = []
+        for key_id, score in sorted(ranked.items(), key=lambda item: (-item[1], item[0])):
+            for person in self.people[key_id]:
+                candidates.append({
+                    "id": self.person_ids[person],
+                    "name": self.person_names[person],
+                    "birth": self.person_births[person],
+                    "score": round(score, 3),
+                })
+        return candidates[:limit]
+
+
+def trigrams(text, whole=True):
+    """
+    Returns the set of trigrams of `text`, padded so that the start of
+    the text counts too, and its end unless `whole` is False.
+    """
+    padded = f"  {text} " if whole else f"  {text}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
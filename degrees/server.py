@@ -0,0 +1,223 @@
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import degrees
+from util import LRUCache
+
+# Number of recent latencies per endpoint that metrics are computed over
+LATENCY_WINDOW = 10000
+
+# Number of recent shortest paths kept in the result cache
+CACHE_SIZE = 10000
+
+STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found"}
+
+
+def main():
+    if not 2 <= len(sys.argv) <= 4:
+        sys.exit("Usage: python server.py directory [port] [processes]")
+    directory = sys.argv[1]
+    port = int(sys.argv[2]) if len(sys.argv) >= 3 else 8050
+    processes = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    print("Loading data...")
+    degrees.load_data(directory, compact=True)
+    print("Data loaded.")
+
+    server = Server(directory, processes)
+    try:
+        asyncio.run(server.serve("127.0.0.1", port))
+    except KeyboardInterrupt:
+        pass
+
+
+class Server():
+    """
+    HTTP front end answering degrees queries against a warm graph.
+
+        GET /person?name=...                 people with that name
+        GET /search?name=...                 ranked candidates for a
+                                             partial or misspelled name
+        GET /path?source=...&target=...      shortest path between two
+                                             people, by id or unique name
+        GET /metrics                         request counts, p50/p99
+                                             latency and cache counters
+
+    Searches run on a process pool whose workers share the graph
+    loaded before the server started.
+    """
+
+    def __init__(self, directory, processes=None):
+        self.executor = ProcessPoolExecutor(
+            processes, initializer=degrees.load_once, initargs=(directory,)
+        )
+        self.cache = LRUCache(CACHE_SIZE, size=lambda path: 1)
+        self.latencies = {}
+        self.handlers = {
+            "/person": self.person,
+            "/search": self.search,
+            "/path": self.path,
+            "/metrics": self.metrics,
+        }
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.connection, host, port)
+        print(f"Serving on http://{host}:{port}")
+        with self.executor:
+            async with server:
+                await server.serve_forever()
+
+    async def connection(self, reader, writer):
+        """
+        Answer GET requests on one keep-alive connection until it closes.
+        """
+        try:
+            while True:
+                request = await reader.readline()
+                if not request:
+                    break
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+
+                start = time.perf_counter()
+                try:
+                    _, target, _ = request.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    status, body, endpoint = 400, {"error": "Malformed request."}, None
+                else:
+                    url = urlsplit(target)
+                    endpoint = url.path
+                    status, body = await self.dispatch(endpoint, parse_qs(url.query))
+
+                payload = json.dumps(body).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+                if endpoint in self.handlers:
+                    self.record(endpoint, time.perf_counter() - start)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, endpoint, query):
+        handler = self.handlers.get(endpoint)
+        if handler is None:
+            return 404, {"error": "Unknown endpoint."}
+        params = {key: values[0] for key, values in query.items()}
+        return await handler(params)
+
+    async def person(self, params):
+        if "name" not in params:
+            return 400, {"error": "Missing name."}
+        graph = degrees.graph
+        return 200, {"people": [
+            {
+                "id": graph.person_ids[person],
+                "name": graph.person_names[person],
+                "birth": graph.person_births[person],
+            }
+            for person in graph.people_for_name(params["name"])
+        ]}
+
+    async def search(self, params):
+        if "name" not in params:
+            return 400, {"error": "Missing name."}
+        return 200, {"people": degrees.find_people(params["name"])}
+
+    async def path(self, params):
+        people = []
+        for role in ("source", "target"):
+            if role not in params:
+                return 400, {"error": f"Missing {role}."}
+            person = resolve(params[role])
+            if person is None:
+                return 404, {
+                    "error": "No unique person with that name.",
+                    role: params[role],
+                    "candidates": degrees.find_people(params[role]),
+                }
+            people.append(person)
+        key = tuple(people)
+
+        path = self.cache.get(key)
+        if path is None:
+            loop = asyncio.get_running_loop()
+            path = await loop.run_in_executor(self.executor, find_path, *key)
+            self.cache.put(key, path)
+
+        return 200, {
+            "source": people[0],
+            "target": people[1],
+            "degrees": None if path is False else len(path),
+            "path": None if path is False else path,
+        }
+
+    async def metrics(self, params):
+        return 200, {
+            "endpoints": {
+                endpoint: summarize(latencies)
+                for endpoint, latencies in self.latencies.items()
+            },
+            "cache": {
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+                "evictions": self.cache.evictions,
+            },
+        }
+
+    def record(self, endpoint, latency):
+        if endpoint not in self.latencies:
+            self.latencies[endpoint] = [0, deque(maxlen=LATENCY_WINDOW)]
+        self.latencies[endpoint][0] += 1
+        self.latencies[endpoint][1].append(latency)
+
+
+def resolve(person):
+    """
+    Returns the person_id for a person_id, a unique name, or a name with
+    a birth year such as "Kevin Bacon (1958)", or None.
+    """
+    if person in degrees.people:
+        return person
+    return degrees.person_id_for_name(person, interactive=False)
+
+
+def find_path(source, target):
+    """
+    Returns the shortest path as a list of [movie_id, person_id] pairs,
+    or False if there is none, so that it can be cached.
+    """
+    path = degrees.bidirectional_path(source, target)
+    return False if path is None else [list(step) for step in path]
+
+
+def summarize(latencies):
+    count, window = latencies
+    ordered = sorted(window)
+    return {
+        "requests": count,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+    }
+
+
+def percentile(ordered, p):
+    """
+    Returns the `p`th percentile of a sorted list, by the nearest rank.
+    """
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, len(ordered) * p // 100)]
+
+
+if __name__ == "__main__":
+    main()
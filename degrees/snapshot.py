@@ -0,0 +1,214 @@
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+
+from graph import Graph
+
+# Bump VERSION whenever the layout below changes
+MAGIC = b"DEGREES\0"
+VERSION = 1
+
+FILENAME = "degrees.snapshot"
+CSV_FILES = ("people.csv", "movies.csv", "stars.csv")
+
+# Magic, version, section count, then (mtime_ns, size) for each CSV file
+HEADER = struct.Struct(f"<8sII{2 * len(CSV_FILES)}q")
+SECTION = struct.Struct("<qq")
+
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars")
+STRINGS = (
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years",
+)
+
+# An array per name in ARRAYS, a blob and its offsets per name in
+# STRINGS, and three sort orders
+SECTIONS = len(ARRAYS) + 2 * len(STRINGS) + 3
+
+
+def fingerprint(directory):
+    """
+    Returns the (mtime_ns, size) pairs of the dataset's CSV files, flattened.
+    """
+    values = []
+    for filename in CSV_FILES:
+        stat = os.stat(os.path.join(directory, filename))
+        values.extend((stat.st_mtime_ns, stat.st_size))
+    return tuple(values)
+
+
+def save_snapshot(graph, directory):
+    """
+    Write `graph` as a binary snapshot next to the CSV files it was parsed from.
+    """
+    sections = [getattr(graph, name).tobytes() for name in ARRAYS]
+    for name in STRINGS:
+        sections.extend(encode_strings(getattr(graph, name)))
+
+    # Sort orders that let the snapshot answer lookups by binary search
+    sections.append(sort_order(graph.person_ids, identity))
+    sections.append(sort_order(graph.movie_ids, identity))
+    sections.append(sort_order(graph.person_names, str.lower))
+
+    offset = align(HEADER.size + SECTION.size * len(sections))
+    table = []
+    for section in sections:
+        table.append(SECTION.pack(offset, len(section)))
+        offset = align(offset + len(section))
+
+    path = os.path.join(directory, FILENAME)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(sections), *fingerprint(directory)))
+            f.write(b"".join(table))
+            for (start, _), section in zip(map(SECTION.unpack, table), sections):
+                f.write(b"\0" * (start - f.tell()))
+                f.write(section)
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        raise
+
+
+def load_snapshot(directory):
+    """
+    Memory-map the snapshot in `directory` and return it as a Graph,
+    or None if there is no snapshot or it is stale or damaged.
+    """
+    path = os.path.join(directory, FILENAME)
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        return read_snapshot(data, directory)
+    except (struct.error, TypeError, ValueError):
+        return None
+
+
+def read_snapshot(data, directory):
+    """
+    Returns the Graph in the mapped snapshot `data`, or None if it is
+    stale. Raises struct.error, TypeError or ValueError if it is damaged.
+    """
+    magic, version, count, *stamp = HEADER.unpack_from(data)
+    if (magic, version) != (MAGIC, VERSION) or tuple(stamp) != fingerprint(directory):
+        return None
+    if count != SECTIONS:
+        raise ValueError(f"snapshot has {count} sections, not {SECTIONS}")
+
+    view = memoryview(data)
+    sections = []
+    for i in range(count):
+        start, length = SECTION.unpack_from(data, HEADER.size + SECTION.size * i)
+        if start < 0 or length < 0 or start + length > len(data):
+            raise ValueError("snapshot is truncated")
+        sections.append(view[start:start + length])
+    sections.reverse()
+
+    graph = Graph()
+    for name in ARRAYS:
+        setattr(graph, name, sections.pop().cast("i"))
+    for name in STRINGS:
+        blob = sections.pop()
+        setattr(graph, name, StringTable(blob, sections.pop().cast("q")))
+
+    graph.person_index = SortedIndex(graph.person_ids, sections.pop().cast("i"), identity)
+    graph.movie_index = SortedIndex(graph.movie_ids, sections.pop().cast("i"), identity)
+    graph.name_index = SortedIndex(graph.person_names, sections.pop().cast("i"), str.lower)
+    return graph
+
+
+def align(offset):
+    return (offset + 7) & ~7
+
+
+def identity(string):
+    return string
+
+
+def encode_strings(strings):
+    """
+    Returns a blob of the UTF-8 encoded `strings`
+    and the byte offsets of where each one starts and ends.
+    """
+    encoded = [string.encode() for string in strings]
+    offsets = array("q", [0])
+    for string in encoded:
+        offsets.append(offsets[-1] + len(string))
+    return b"".join(encoded), offsets.tobytes()
+
+
+def sort_order(strings, normalize):
+    """
+    Returns the indices of `strings`, sorted by the UTF-8 encoding
+    of their `normalize`d form, as bytes.
+    """
+    order = sorted(range(len(strings)), key=lambda i: normalize(strings[i]).encode())
+    return array("i", order).tobytes()
+
+
+class StringTable(Sequence):
+    """
+    Sequence of strings decoded on demand from a blob and its offsets.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return str(self.blob[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+class SortedIndex(Mapping):
+    """
+    Maps `normalize`d strings of a StringTable to their indices by binary
+    search over a sort order, in place of a dictionary that would have
+    to be rebuilt on every load.
+
+    A key shared by several entries maps to a tuple of their indices.
+    """
+
+    def __init__(self, strings, order, normalize):
+        self.strings = strings
+        self.order = order
+        self.normalize = normalize
+
+    def sort_key(self, position):
+        return self.normalize(self.strings[self.order[position]]).encode()
+
+    def __getitem__(self, key):
+        encoded = self.normalize(key).encode()
+        start = bisect_left(range(len(self.order)), encoded, key=self.sort_key)
+        count = bisect_right(range(start, len(self.order)), encoded, key=self.sort_key)
+        if count == 0:
+            raise KeyError(key)
+        if count == 1:
+            return self.order[start]
+        return tuple(sorted(self.order[start:start + count]))
+
+    def __iter__(self):
+        previous = None
+        for index in self.order:
+            key = self.normalize(self.strings[index])
+            if key != previous:
+                yield key
+            previous = key
+
+    def __len__(self):
+        return sum(1 for _ in self)
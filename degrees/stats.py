@@ -0,0 +1,101 @@
+import multiprocessing
+import random
+import sys
+import time
+
+import degrees
+
+
+def main():
+    if not 2 <= len(sys.argv) <= 5:
+        sys.exit("Usage: python stats.py directory [samples] [seconds] [processes]")
+    directory = sys.argv[1]
+    samples = int(sys.argv[2]) if len(sys.argv) >= 3 else 100
+    seconds = float(sys.argv[3]) if len(sys.argv) >= 4 else 60
+    processes = int(sys.argv[4]) if len(sys.argv) == 5 else None
+
+    print("Loading data...")
+    degrees.load_data(directory, compact=True)
+    print("Data loaded.")
+
+    sizes = degrees.graph.component_sizes()
+    print_components(sizes)
+
+    start = time.monotonic()
+    sources = random.sample(range(len(degrees.graph.person_ids)),
+                            min(samples, len(degrees.graph.person_ids)))
+    results = sample_distances(sources, directory, start + seconds, processes)
+    print(f"Sampled {len(results)} of {samples} sources "
+          f"in {time.monotonic() - start:.1f} s.")
+    print_distances(results, len(degrees.graph.person_ids))
+
+
+def sample_distances(sources, directory, deadline, processes=None):
+    """
+    Returns (source, distance counts) pairs for as many of `sources` as
+    a process pool can search before `deadline`, in time.monotonic()
+    seconds.
+    """
+    results = []
+    pool = multiprocessing.Pool(
+        processes, initializer=degrees.load_once, initargs=(directory,)
+    )
+    with pool:
+        searches = pool.imap_unordered(distances_from, sources)
+        for _ in sources:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                results.append(searches.next(timeout=remaining))
+            except multiprocessing.TimeoutError:
+                break
+    return results
+
+
+def distances_from(source):
+    return source, degrees.graph.distance_counts(source)
+
+
+def print_components(sizes):
+    print(f"{len(sizes)} connected components.")
+    print(f"  Largest: {', '.join(str(size) for size in sizes[:10])}")
+    print(f"  Isolated people: {sizes.count(1)}")
+
+
+def print_distances(results, population):
+    """
+    Print the histogram of degrees of separation over all sampled pairs,
+    and the eccentricity and mean separation of each sampled person.
+    """
+    histogram = []
+    unreachable = 0
+    for _, counts in results:
+        for distance, count in enumerate(counts):
+            if distance == 0:
+                continue
+            while len(histogram) <= distance:
+                histogram.append(0)
+            histogram[distance] += count
+        unreachable += population - sum(counts)
+
+    pairs = sum(histogram)
+    print("Degrees of separation over sampled pairs:")
+    for distance in range(1, len(histogram)):
+        print(f"  {distance}: {histogram[distance]}")
+    print(f"  Not connected: {unreachable}")
+    if pairs:
+        mean = sum(d * count for d, count in enumerate(histogram)) / pairs
+        print(f"  Mean: {mean:.2f}")
+
+    print("Eccentricity and mean separation within each component:")
+    graph = degrees.graph
+    for source, counts in sorted(results, key=lambda result: -len(result[1])):
+        reached = sum(counts) - 1
+        mean = sum(d * count for d, count in enumerate(counts)) / reached if reached else 0
+        print(f"  {graph.person_names[source]} ({graph.person_ids[source]}): "
+              f"{len(counts) - 1}, {mean:.2f}")
+
+
+if __name__ == "__main__":
+    main()
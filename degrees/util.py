@@ -1,3 +1,6 @@
+from collections import deque, OrderedDict
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +10,17 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+
+        # Maps each state in the frontier to how many nodes hold it
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +29,17 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard(node)
             return node
 
+    def discard(self, node):
+        count = self.states[node.state] - 1
+        if count:
+            self.states[node.state] = count
+        else:
+            del self.states[node.state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +47,53 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard(node)
             return node
+
+
+class LRUCache():
+    """
+    Least-recently-used cache that evicts entries once the summed
+    `size` of its values would exceed `max_size`.
+    """
+
+    def __init__(self, max_size, size=len):
+        self.max_size = max_size
+        self.size = size
+        self.entries = OrderedDict()
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """
+        Store `value` under `key`, evicting older entries to make room.
+        Returns False if the value alone is larger than the cache.
+        """
+        size = self.size(value)
+        if size > self.max_size:
+            return False
+        if key in self.entries:
+            self.used -= self.size(self.entries.pop(key))
+        while self.used + size > self.max_size:
+            _, evicted = self.entries.popitem(last=False)
+            self.used -= self.size(evicted)
+            self.evictions += 1
+        self.entries[key] = value
+        self.used += size
+        return True
+
+    def clear(self):
+        self.entries.clear()
+        self.used = 0
@@ -0,0 +1,152 @@
+import random
+import sys
+import time
+
+import heredity
+from inference import elimination_tree, junction_tree, pedigree_factors
+from vectorized import vectorized_probabilities
+
+BENCHMARKS = {}
+
+FAMILIES = ("data/family0.csv", "data/family1.csv", "data/family2.csv")
+
+
+def benchmark(function):
+    """
+    Register `function` as a benchmark runnable from the command line.
+    """
+    BENCHMARKS[function.__name__] = function
+    return function
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        sys.exit(f"Usage: python benchmark.py {{{','.join(BENCHMARKS)}}} [args]")
+    BENCHMARKS[sys.argv[1]](*sys.argv[2:])
+
+
+def random_pedigree(n, marriages=0.02, observed=0.5, seed=0):
+    """
+    Returns people as returned by `load_data` for a random pedigree of
+    `n` people. Each child's parents are an earlier person and a new
+    founder who marries in, or with probability `marriages` two earlier
+    people, which closes loops in the pedigree. Each trait is known with
+    probability `observed`.
+    """
+    rng = random.Random(seed)
+    people = {}
+
+    def add(mother=None, father=None):
+        name = f"P{len(people)}"
+        people[name] = {
+            "name": name,
+            "mother": mother,
+            "father": father,
+            "trait": rng.random() < 0.3 if rng.random() < observed else None,
+        }
+        return name
+
+    add()
+    while len(people) < n:
+        names = list(people)
+        mother = rng.choice(names)
+        if len(people) + 1 < n and rng.random() >= marriages:
+            father = add()
+        else:
+            father = rng.choice(names)
+            if father == mother:
+                continue
+        add(mother, father)
+    return people
+
+
+def largest_difference(expected, probabilities):
+    return max(
+        abs(expected[person][field][value] - probabilities[person][field][value])
+        for person in expected
+        for field in expected[person]
+        for value in expected[person][field]
+    )
+
+
+@benchmark
+def inference(sizes="4,6,7,100,300,1000", enumeration_limit="7"):
+    """
+    Checks the junction tree against enumeration on the bundled families
+    and on random pedigrees of up to `enumeration_limit` people, and
+    times both on random pedigrees of each size.
+    """
+    for path in FAMILIES:
+        people = heredity.load_data(path)
+        error = largest_difference(heredity.enumerate_probabilities(people),
+                                   junction_tree(people, heredity.PROBS))
+        print(f"{path}: max difference {error:.1e}")
+
+    for n in map(int, sizes.split(",")):
+        people = random_pedigree(n)
+        _, cliques = elimination_tree(people, pedigree_factors(people, heredity.PROBS))
+        start = time.perf_counter()
+        probabilities = junction_tree(people, heredity.PROBS)
+        print(f"{n} people: junction tree {time.perf_counter() - start:.3f} s "
+              f"(largest clique {max(map(len, cliques.values()))})")
+
+        if n <= int(enumeration_limit):
+            start = time.perf_counter()
+            expected = heredity.enumerate_probabilities(people)
+            print(f"  enumeration {time.perf_counter() - start:.3f} s, "
+                  f"max difference {largest_difference(expected, probabilities):.1e}")
+
+
+@benchmark
+def enumeration(sizes="4,6,8"):
+    """
+    Times enumeration over genes and traits against enumeration over
+    genes alone on the bundled families and on random pedigrees of each
+    size, with the configurations each visits.
+    """
+    cases = [(path, heredity.load_data(path)) for path in FAMILIES]
+    cases += [(f"{n} people", random_pedigree(n)) for n in map(int, sizes.split(","))]
+    for label, people in cases:
+        unknown = sum(1 for person in people.values() if person["trait"] is None)
+
+        start = time.perf_counter()
+        expected = heredity.enumerate_probabilities(people)
+        elapsed = time.perf_counter() - start
+        print(f"{label}: genes and traits {elapsed:.3f} s, "
+              f"{3 ** len(people) * 2 ** unknown} configurations")
+
+        start = time.perf_counter()
+        probabilities, visited = heredity.enumerate_genes(people)
+        elapsed = time.perf_counter() - start
+        print(f"  genes only {elapsed:.3f} s, {visited} configurations, "
+              f"max difference {largest_difference(expected, probabilities):.1e}")
+
+
+@benchmark
+def kernel(sizes="4,8,10,12,14", loop_limit="8"):
+    """
+    Times the vectorized kernel against enumeration over genes on the
+    bundled families and on random pedigrees of each size, in gene
+    configurations per second. The loop only runs on pedigrees of up to
+    `loop_limit` people, and the junction tree checks the rest.
+    """
+    cases = [(path, heredity.load_data(path)) for path in FAMILIES]
+    cases += [(f"{n} people", random_pedigree(n)) for n in map(int, sizes.split(","))]
+    for label, people in cases:
+        start = time.perf_counter()
+        probabilities, visited = vectorized_probabilities(people, heredity.PROBS)
+        elapsed = time.perf_counter() - start
+        print(f"{label}: kernel {elapsed:.3f} s, {visited / elapsed:,.0f} configurations/s")
+
+        if len(people) <= int(loop_limit):
+            start = time.perf_counter()
+            expected, visited = heredity.enumerate_genes(people)
+            elapsed = time.perf_counter() - start
+            print(f"  loop {elapsed:.3f} s, {visited / elapsed:,.0f} configurations/s")
+        else:
+            expected = junction_tree(people, heredity.PROBS)
+        print(f"  max difference {largest_difference(expected, probabilities):.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ import csv
 import itertools
 import sys
 
+from inference import junction_tree
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -42,7 +44,24 @@ def main():
     if len(sys.argv) != 2:
         sys.exit("Usage: python heredity.py data.csv")
     people = load_data(sys.argv[1])
+    probabilities = junction_tree(people, PROBS)
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
 
+
+def enumerate_probabilities(people):
+    """
+    Return gene and trait probabilities for each person by summing the
+    joint probability of every combination of genes and traits that
+    agrees with the known traits.
+    """
     # Keep track of gene and trait probabilities for each person
     probabilities = {
         person: {
@@ -81,15 +100,54 @@ def main():
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
+    return probabilities
 
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+
+def enumerate_genes(people):
+    """
+    Return gene and trait probabilities for each person, like
+    `enumerate_probabilities`, and the number of gene configurations
+    visited, by enumerating genes alone.
+
+    Traits only depend on their person's genes, so known traits are
+    fixed and unknown ones are summed over in closed form: each
+    configuration adds `PROBS["trait"]` of the person's genes to both of
+    their trait values, weighted by its probability.
+    """
+    probabilities = {
+        person: {
+            "gene": {2: 0, 1: 0, 0: 0},
+            "trait": {True: 0, False: 0}
+        }
+        for person in people
+    }
+
+    visited = 0
+    names = set(people)
+    for one_gene in powerset(names):
+        for two_genes in powerset(names - one_gene):
+            visited += 1
+
+            # Joint probability of these genes and the known traits
+            p = 1
+            for person in people:
+                this_genes = get_nbr_genes(person, one_gene, two_genes)
+                p *= get_gene_prob(people, person, one_gene, two_genes)
+                if people[person]['trait'] is not None:
+                    p *= PROBS['trait'][this_genes][people[person]['trait']]
+
+            for person in people:
+                this_genes = get_nbr_genes(person, one_gene, two_genes)
+                probabilities[person]['gene'][this_genes] += p
+                trait = people[person]['trait']
+                if trait is None:
+                    for value in (True, False):
+                        probabilities[person]['trait'][value] += p * PROBS['trait'][this_genes][value]
+                else:
+                    probabilities[person]['trait'][trait] += p
+
+    normalize(probabilities)
+    return probabilities, visited
 
 
 def load_data(filename):
@@ -143,18 +201,7 @@ def joint_probability(people, one_gene, two_genes, have_trait):
 
         # Calculate probability to have the genes of interest
         this_genes = get_nbr_genes(person, one_gene, two_genes)
-        if people[person]['mother'] is None:  # Assumes both parents info, or nothing
-            gene_prob = PROBS['gene'][this_genes]
-        else:  # If there is parent's info
-            prob_mother = get_parent_prob(people[person]['mother'], one_gene, two_genes)
-            prob_father = get_parent_prob(people[person]['father'], one_gene, two_genes)
-
-            if this_genes == 0:
-                gene_prob = (1 - prob_mother) * (1 - prob_father)  # None can transmit
-            elif this_genes == 1:
-                gene_prob = (1 - prob_mother) * prob_father + prob_mother * (1 - prob_father)  # Two possibilities
-            else:
-                gene_prob = prob_father * prob_mother  # Both need to transmit
+        gene_prob = get_gene_prob(people, person, one_gene, two_genes)
 
         # Calculate probability to have trait, given genes of interest
         trait = get_trait(person, have_trait)  # Trait for this person
@@ -165,6 +212,27 @@ def joint_probability(people, one_gene, two_genes, have_trait):
     return joint_p
 
 
+def get_gene_prob(people, person, one_gene, two_genes):
+    """
+    Return probability that person has their number of genes, given
+    their parents' number of genes if known
+    """
+    this_genes = get_nbr_genes(person, one_gene, two_genes)
+    if people[person]['mother'] is None:  # Assumes both parents info, or nothing
+        return PROBS['gene'][this_genes]
+
+    # If there is parent's info
+    prob_mother = get_parent_prob(people[person]['mother'], one_gene, two_genes)
+    prob_father = get_parent_prob(people[person]['father'], one_gene, two_genes)
+
+    if this_genes == 0:
+        return (1 - prob_mother) * (1 - prob_father)  # None can transmit
+    elif this_genes == 1:
+        return (1 - prob_mother) * prob_father + prob_mother * (1 - prob_father)  # Two possibilities
+    else:
+        return prob_father * prob_mother  # Both need to transmit
+
+
 def get_trait(person, have_trait):
     return True if person in have_trait else False
 
@@ -0,0 +1,231 @@
+import heapq
+import itertools
+
+# Number of copies of the gene a person can have
+GENES = (0, 1, 2)
+
+
+class Factor():
+    """
+    Nonnegative function over the gene counts of some people.
+
+    `values` lists the value of every assignment to `variables`, in the
+    order of `itertools.product(GENES, repeat=len(variables))`, so the
+    last variable changes fastest.
+    """
+
+    def __init__(self, variables, values):
+        self.variables = tuple(variables)
+        self.values = list(values)
+
+    @classmethod
+    def ones(cls, variables):
+        return cls(variables, [1.0] * len(GENES) ** len(variables))
+
+    def positions(self, variables):
+        """
+        Returns the position in `values` for every assignment to
+        `variables`, a superset of this factor's, in product order.
+        """
+        strides = {
+            variable: len(GENES) ** (len(self.variables) - 1 - i)
+            for i, variable in enumerate(self.variables)
+        }
+        positions = [0]
+        for variable in variables:
+            stride = strides.get(variable, 0)
+            positions = [i + genes * stride for i in positions for genes in GENES]
+        return positions
+
+    def multiply(self, other):
+        """
+        Returns the product of two factors, over the union of their
+        variables.
+        """
+        variables = self.variables + tuple(
+            v for v in other.variables if v not in self.variables
+        )
+        return Factor(variables, [
+            self.values[i] * other.values[j]
+            for i, j in zip(self.positions(variables), other.positions(variables))
+        ])
+
+    def project(self, variables):
+        """
+        Returns the factor over `variables`, which must be a subset of
+        this one's, with every other variable summed out. Its values are
+        scaled to sum to 1, which leaves marginals unchanged and keeps
+        products over hundreds of people from underflowing.
+        """
+        result = Factor(variables, [0.0] * len(GENES) ** len(variables))
+        for i, value in zip(result.positions(self.variables), self.values):
+            result.values[i] += value
+        total = sum(result.values)
+        if total > 0:
+            result.values = [value / total for value in result.values]
+        return result
+
+
+def pedigree_factors(people, probs):
+    """
+    Returns the factors whose product is the joint probability of
+    everyone's gene counts and known traits, for people as returned by
+    `load_data`. Unknown traits sum to 1 and need no factor.
+    """
+    factors = []
+    for person, data in people.items():
+        if data["mother"] is None:
+            factors.append(Factor((person,), [probs["gene"][genes] for genes in GENES]))
+        else:
+            factors.append(inheritance(person, data["mother"], data["father"], probs))
+        if data["trait"] is not None:
+            factors.append(Factor(
+                (person,), [probs["trait"][genes][data["trait"]] for genes in GENES]
+            ))
+    return factors
+
+
+def inheritance(child, mother, father, probs):
+    """
+    Returns the factor of the probability of the child's gene count
+    given both parents' gene counts.
+    """
+    mutation = probs["mutation"]
+    passes = {0: mutation, 1: 0.5, 2: 1 - mutation}
+    values = []
+    for child_genes, mother_genes, father_genes in itertools.product(GENES, repeat=3):
+        from_mother = passes[mother_genes]
+        from_father = passes[father_genes]
+        values.append(
+            (1 - from_mother) * (1 - from_father) if child_genes == 0 else
+            from_mother * (1 - from_father) + (1 - from_mother) * from_father
+            if child_genes == 1 else
+            from_mother * from_father
+        )
+    return Factor((child, mother, father), values)
+
+
+def elimination_tree(people, factors):
+    """
+    Returns people in the order they are eliminated, and for each the
+    clique of people it shares factors with when eliminated, itself
+    first. Each next person is the one whose elimination adds the fewest
+    new edges between its neighbors in the moral graph, as last scored.
+    Scores are only refreshed for the neighbors of each person
+    eliminated, whose neighborhoods are the ones that change.
+
+    The clique of each person's first eliminated neighbor is its parent
+    in the resulting junction tree.
+    """
+    neighbors = {person: set() for person in people}
+    for factor in factors:
+        for variable in factor.variables:
+            neighbors[variable].update(factor.variables)
+    for person in people:
+        neighbors[person].discard(person)
+
+    def score(person):
+        around = list(neighbors[person])
+        fill = sum(
+            1 for i, a in enumerate(around) for b in around[i + 1:]
+            if b not in neighbors[a]
+        )
+        return (fill, len(around), person)
+
+    scores = {person: score(person) for person in people}
+    heap = list(scores.values())
+    heapq.heapify(heap)
+    order = []
+    cliques = {}
+    while heap:
+        entry = heapq.heappop(heap)
+        person = entry[2]
+        if scores.get(person) != entry:
+            continue
+        del scores[person]
+        around = neighbors.pop(person)
+        for neighbor in around:
+            neighbors[neighbor] |= around - {neighbor}
+            neighbors[neighbor].discard(person)
+        for neighbor in around:
+            scores[neighbor] = score(neighbor)
+            heapq.heappush(heap, scores[neighbor])
+        order.append(person)
+        cliques[person] = (person,) + tuple(sorted(around))
+    return order, cliques
+
+
+def junction_tree(people, probs):
+    """
+    Return gene and trait probabilities for each person given the known
+    traits, in the same form as the enumeration in `heredity.main`, by
+    message passing over a junction tree of the pedigree.
+
+    Messages are passed from the first eliminated people towards the
+    last, which is variable elimination, and then back again so that
+    every clique ends up with the evidence from the whole pedigree.
+    """
+    factors = pedigree_factors(people, probs)
+    order, cliques = elimination_tree(people, factors)
+    position = {person: i for i, person in enumerate(order)}
+
+    def first(variables):
+        return min(variables, key=position.__getitem__)
+
+    parent = {
+        person: first(cliques[person][1:]) if len(cliques[person]) > 1 else None
+        for person in order
+    }
+    children = {person: [] for person in order}
+    for person in order:
+        if parent[person] is not None:
+            children[parent[person]].append(person)
+
+    # Each factor belongs to the clique of the first of its variables
+    # to be eliminated, which contains all of them
+    potentials = {person: Factor.ones(cliques[person]) for person in order}
+    for factor in factors:
+        owner = first(factor.variables)
+        potentials[owner] = potentials[owner].multiply(factor)
+
+    # Collect evidence up to the roots
+    up = {}
+    for person in order:
+        belief = potentials[person]
+        for child in children[person]:
+            belief = belief.multiply(up[child])
+        if parent[person] is not None:
+            up[person] = belief.project(cliques[person][1:])
+
+    # Distribute it back down from the roots
+    down = {}
+    for person in reversed(order):
+        base = potentials[person]
+        if parent[person] is not None:
+            base = base.multiply(down[person])
+        for child in children[person]:
+            message = base
+            for other in children[person]:
+                if other != child:
+                    message = message.multiply(up[other])
+            down[child] = message.project(cliques[child][1:])
+
+    probabilities = {}
+    for person in people:
+        belief = potentials[person]
+        if parent[person] is not None:
+            belief = belief.multiply(down[person])
+        for child in children[person]:
+            belief = belief.multiply(up[child])
+        genes = belief.project((person,)).values
+
+        trait = people[person]["trait"]
+        if trait is None:
+            has_trait = sum(p * probs["trait"][g][True] for g, p in zip(GENES, genes))
+        else:
+            has_trait = float(trait)
+        probabilities[person] = {
+            "gene": {2: genes[2], 1: genes[1], 0: genes[0]},
+            "trait": {True: has_trait, False: 1 - has_trait},
+        }
+    return probabilities
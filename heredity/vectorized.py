@@ -0,0 +1,118 @@
+import numpy as np
+
+# Gene configurations evaluated at a time
+CHUNK_SIZE = 1 << 18
+
+
+class Pedigree():
+    """
+    People as returned by `load_data`, compiled into arrays so that
+    joint probabilities are computed for many gene configurations at
+    once.
+
+    A configuration is an integer whose base-3 digits are the gene
+    counts of each person, the first person's being the lowest digit.
+    """
+
+    def __init__(self, people, probs):
+        self.names = list(people)
+        index = {name: i for i, name in enumerate(self.names)}
+        n = len(self.names)
+        self.powers = 3 ** np.arange(n, dtype=np.int64)
+
+        mutation = probs["mutation"]
+        passes = np.array([mutation, 0.5, 1 - mutation])
+        from_mother = passes[:, np.newaxis]
+        from_father = passes[np.newaxis, :]
+
+        # Probability of each child gene count given both parents',
+        # indexed [child, mother, father]
+        self.inheritance = np.array([
+            (1 - from_mother) * (1 - from_father),
+            from_mother * (1 - from_father) + (1 - from_mother) * from_father,
+            from_mother * from_father,
+        ])
+        self.prior = np.array([probs["gene"][genes] for genes in range(3)])
+        self.has_trait = np.array([probs["trait"][genes][True] for genes in range(3)])
+
+        self.founders = np.array(
+            [i for i, name in enumerate(self.names) if people[name]["mother"] is None],
+            dtype=np.int64,
+        )
+        self.children = np.array(
+            [i for i, name in enumerate(self.names) if people[name]["mother"] is not None],
+            dtype=np.int64,
+        )
+        self.mothers = np.array(
+            [index[people[self.names[i]]["mother"]] for i in self.children], dtype=np.int64
+        )
+        self.fathers = np.array(
+            [index[people[self.names[i]]["father"]] for i in self.children], dtype=np.int64
+        )
+
+        # Probability of each person's known trait given their gene
+        # count, or 1 where the trait is unknown
+        self.evidence = np.ones((n, 3))
+        self.traits = [people[name]["trait"] for name in self.names]
+        for i, trait in enumerate(self.traits):
+            if trait is not None:
+                self.evidence[i] = [probs["trait"][genes][trait] for genes in range(3)]
+
+    def __len__(self):
+        return len(self.names)
+
+    def genes(self, configurations):
+        """
+        Returns an (m, n) array of the gene count of each person in
+        each of `configurations`.
+        """
+        return (np.asarray(configurations, dtype=np.int64)[:, np.newaxis]
+                // self.powers % 3).astype(np.int8)
+
+    def joint_probabilities(self, genes):
+        """
+        Returns the joint probability of each row of gene counts in
+        `genes` and of the known traits. Unknown traits are summed over.
+        """
+        p = self.prior[genes[:, self.founders]].prod(axis=1)
+        p *= self.inheritance[
+            genes[:, self.children], genes[:, self.mothers], genes[:, self.fathers]
+        ].prod(axis=1)
+        p *= self.evidence[np.arange(len(self)), genes].prod(axis=1)
+        return p
+
+
+def vectorized_probabilities(people, probs, chunk_size=CHUNK_SIZE):
+    """
+    Return gene and trait probabilities for each person, like
+    `heredity.enumerate_genes`, and the number of gene configurations
+    visited, evaluating `chunk_size` configurations at a time.
+
+    Gene marginals are accumulated by a single bincount per chunk over
+    (person, gene count) pairs. Unknown traits follow from them in
+    closed form once all configurations are summed.
+    """
+    pedigree = Pedigree(people, probs)
+    n = len(pedigree)
+    total = 3 ** n
+    slots = np.arange(n) * 3
+    marginals = np.zeros(3 * n)
+    for start in range(0, total, chunk_size):
+        genes = pedigree.genes(np.arange(start, min(start + chunk_size, total)))
+        p = pedigree.joint_probabilities(genes)
+        marginals += np.bincount(
+            (genes + slots).ravel(),
+            weights=np.repeat(p, n),
+            minlength=3 * n,
+        )
+
+    marginals = marginals.reshape(n, 3)
+    marginals /= marginals.sum(axis=1, keepdims=True)
+    probabilities = {}
+    for name, genes, trait in zip(pedigree.names, marginals, pedigree.traits):
+        has_trait = float(genes @ pedigree.has_trait) if trait is None else float(trait)
+        probabilities[name] = {
+            "gene": {2: float(genes[2]), 1: float(genes[1]), 0: float(genes[0])},
+            "trait": {True: has_trait, False: 1 - has_trait},
+        }
+    return probabilities, total
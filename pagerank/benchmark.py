@@ -0,0 +1,524 @@
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import pagerank
+from crawler import crawl_graph
+from graphcache import cached_crawl_graph
+from incremental import IncrementalPageRank
+from linkgraph import LinkGraph
+from outofcore import MappedGraph, build_edges, mapped_pagerank, save_edges
+from solvers import (
+    MAX_ITERATIONS, SOLVERS, TOLERANCE, IterationStats, block_power_iteration,
+    power_iteration, solve,
+)
+from walkers import walk_batches
+
+BENCHMARKS = {}
+
+CORPORA = ("corpus0", "corpus1", "corpus2")
+
+
+def benchmark(function):
+    """
+    Register `function` as a benchmark runnable from the command line.
+    """
+    BENCHMARKS[function.__name__] = function
+    return function
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        sys.exit(f"Usage: python benchmark.py {{{','.join(BENCHMARKS)}}} [args]")
+    BENCHMARKS[sys.argv[1]](*sys.argv[2:])
+
+
+def random_graph(n, degree, seed=0):
+    """
+    Returns a LinkGraph of `n` pages with about `degree` uniformly
+    random links each.
+    """
+    rng = np.random.default_rng(seed)
+    sources = rng.integers(0, n, n * degree)
+    targets = rng.integers(0, n, n * degree)
+    keep = sources != targets
+    return LinkGraph.from_edges(n, sources[keep], targets[keep])
+
+
+def power_law_graph(n, degree, exponent=2.1, seed=0):
+    """
+    Returns a LinkGraph of `n` pages with about `degree` links each on
+    average, where both the number of links of a page and how often a
+    page is linked to follow power laws of `exponent`. Pages whose number
+    of links rounds down to 0 are dangling.
+    """
+    rng = np.random.default_rng(seed)
+    shape = exponent - 1
+    degrees = (degree * (shape - 1) / shape * (rng.pareto(shape, n) + 1)).astype(np.int64)
+    degrees = np.minimum(degrees, n - 1)
+
+    # Popularity falls off with a random rank given to each page
+    popularity = rng.permutation(n) + 1.0
+    weights = popularity ** (-1 / shape)
+    sources = np.repeat(np.arange(n), degrees)
+    targets = rng.choice(n, len(sources), p=weights / weights.sum())
+    keep = sources != targets
+    return LinkGraph.from_edges(n, sources[keep], targets[keep])
+
+
+def barabasi_albert_graph(n, degree, seed=0):
+    """
+    Returns a LinkGraph grown by preferential attachment: each new page
+    links to `degree` distinct earlier pages, each chosen with
+    probability proportional to the number of links it takes part in.
+    """
+    rng = random.Random(seed)
+    degree = min(degree, n - 1)
+    sources = []
+    targets = []
+
+    # Both ends of every link so far, so that a uniform pick from it is
+    # a pick proportional to degree
+    ends = []
+    for page in range(degree, n):
+        if page == degree:
+            chosen = range(degree)
+        else:
+            chosen = set()
+            while len(chosen) < degree:
+                chosen.add(ends[int(rng.random() * len(ends))])
+        for target in chosen:
+            sources.append(page)
+            targets.append(target)
+            ends.append(page)
+            ends.append(target)
+    return LinkGraph.from_edges(n, sources, targets)
+
+
+def dangling_graph(n, degree, fraction=0.5, seed=0):
+    """
+    Returns a LinkGraph of `n` pages where `fraction` of the pages have
+    no links, and the others have about `degree` uniformly random links.
+    """
+    rng = np.random.default_rng(seed)
+    linking = np.flatnonzero(rng.random(n) >= fraction)
+    sources = rng.choice(linking, len(linking) * degree)
+    targets = rng.integers(0, n, len(sources))
+    keep = sources != targets
+    return LinkGraph.from_edges(n, sources[keep], targets[keep])
+
+
+GENERATORS = {
+    "erdos-renyi": random_graph,
+    "barabasi-albert": barabasi_albert_graph,
+    "power-law": power_law_graph,
+    "dangling": dangling_graph,
+}
+
+
+def to_corpus(graph):
+    """
+    Returns the corpus dictionary for a LinkGraph.
+    """
+    return {
+        graph.pages[i]: {graph.pages[j] for j in graph.links(i)}
+        for i in range(len(graph))
+    }
+
+
+@benchmark
+def power(sizes="1000,100000,1000000", degree="8", legacy_limit="10000"):
+    """
+    Checks the vectorized engine against iterate_pagerank on the bundled
+    corpora, then times both on random graphs of each size. The pure
+    Python iteration only runs up to `legacy_limit` pages.
+    """
+    for directory in CORPORA:
+        corpus = pagerank.crawl(directory)
+        expected = pagerank.iterate_pagerank(corpus, pagerank.DAMPING)
+        ranks = pagerank.vectorized_pagerank(corpus, pagerank.DAMPING)
+        error = max(abs(ranks[page] - expected[page]) for page in corpus)
+        print(f"{directory}: max difference {error:.1e}")
+
+    for n in map(int, sizes.split(",")):
+        start = time.perf_counter()
+        graph = random_graph(n, int(degree))
+        built = time.perf_counter()
+        stats = IterationStats()
+        power_iteration(graph, pagerank.DAMPING, stats=stats)
+        print(f"{n} pages, {len(graph.targets)} links")
+        print(f"  build:  {built - start:.3f} s")
+        print(f"  solve:  {stats.seconds:.3f} s ({stats.iterations} iterations)")
+
+        if n <= int(legacy_limit):
+            stats = IterationStats()
+            pagerank.iterate_pagerank(to_corpus(graph), pagerank.DAMPING, stats)
+            print(f"  iterate_pagerank: {stats.seconds:.3f} s ({stats.iterations} iterations)")
+
+
+def legacy_sample_pagerank(corpus, damping_factor, n):
+    ranks = {ipage: 0 for ipage in corpus}
+    curr_page = random.choice(list(corpus))
+    pages = sorted(list(corpus.keys()))
+    for _ in range(n):
+        distribution = pagerank.transition_model(corpus, curr_page, damping_factor)
+        weights = [distribution[page] for page in pages]
+        curr_page = random.choices(population=pages, weights=weights)[0]
+        ranks[curr_page] += 1 / n
+    return ranks
+
+
+@benchmark
+def sampling(pages="100000", samples="10000000", legacy_samples="1000"):
+    """
+    Measures sample_pagerank throughput, in samples per second, on a
+    random corpus, against the transition_model loop it replaced.
+    """
+    corpus = to_corpus(random_graph(int(pages), 8))
+
+    start = time.perf_counter()
+    pagerank.sample_pagerank(corpus, pagerank.DAMPING, int(samples))
+    elapsed = time.perf_counter() - start
+    print(f"sample_pagerank: {int(samples) / elapsed:,.0f} samples/s")
+
+    start = time.perf_counter()
+    legacy_sample_pagerank(corpus, pagerank.DAMPING, int(legacy_samples))
+    elapsed = time.perf_counter() - start
+    print(f"transition_model loop: {int(legacy_samples) / elapsed:,.0f} samples/s")
+
+
+@benchmark
+def walkers(pages="100000", samples="100000000", processes="4"):
+    """
+    Measures the throughput of the multi-walker sampler, in one process
+    and over a pool, and the width of its confidence intervals.
+    """
+    graph = random_graph(int(pages), 8)
+    n = int(samples)
+    for label, pool in (("1 process", 0), (f"{processes} processes", int(processes))):
+        start = time.perf_counter()
+        estimates, intervals = walk_batches(graph, pagerank.DAMPING, n, processes=pool)
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {n / elapsed:,.0f} samples/s")
+        print(f"  median relative 95% interval: "
+              f"{np.median(intervals / estimates):.2%}")
+
+
+def write_corpus(graph, directory):
+    """
+    Write a LinkGraph as a directory of HTML pages that link to each other.
+    """
+    for i in range(len(graph)):
+        links = "\n".join(
+            f'<li><a href="{j}.html">Page {j}</a></li>' for j in graph.links(i)
+        )
+        with open(os.path.join(directory, f"{i}.html"), "w") as f:
+            f.write(f"<!DOCTYPE html>\n<html>\n<body>\n<ul>\n{links}\n</ul>\n</body>\n</html>\n")
+
+
+@benchmark
+def crawl(pages="20000", processes=None):
+    """
+    Times crawl against the streaming crawler on a synthetic corpus.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        write_corpus(random_graph(int(pages), 8), directory)
+
+        start = time.perf_counter()
+        pagerank.crawl(directory)
+        elapsed = time.perf_counter() - start
+        print(f"crawl: {int(pages) / elapsed:,.0f} pages/s")
+
+        start = time.perf_counter()
+        crawl_graph(directory, None if processes is None else int(processes))
+        elapsed = time.perf_counter() - start
+        print(f"crawl_graph: {int(pages) / elapsed:,.0f} pages/s")
+
+
+@benchmark
+def cache(pages="100000", edits="10", processes=None):
+    """
+    Times a cold crawl that fills the link graph cache, a warm start
+    from it, and a start after `edits` pages were rewritten.
+    """
+    processes = None if processes is None else int(processes)
+    with tempfile.TemporaryDirectory() as directory:
+        graph = random_graph(int(pages), 8)
+        write_corpus(graph, directory)
+
+        for label in ("cold", "warm"):
+            start = time.perf_counter()
+            cached_crawl_graph(directory, processes)
+            print(f"{label}: {time.perf_counter() - start:.3f} s")
+
+        rng = np.random.default_rng(1)
+        for i in rng.choice(len(graph), int(edits), replace=False):
+            with open(os.path.join(directory, f"{i}.html"), "a") as f:
+                f.write(f'<a href="{(i + 1) % len(graph)}.html">next</a>\n')
+        start = time.perf_counter()
+        cached_crawl_graph(directory, processes)
+        print(f"after {edits} edits: {time.perf_counter() - start:.3f} s")
+
+
+@benchmark
+def incremental(pages="100000", edits="10", tolerance="1e-10"):
+    """
+    Applies `edits` random link additions and removals, plus one page
+    added and one removed, to a random corpus, and times bringing its
+    ranks up to date each way against a full recompute.
+    """
+    n, tolerance = int(pages), float(tolerance)
+    corpus = {str(page): {str(link) for link in links}
+              for page, links in to_corpus(random_graph(n, 8)).items()}
+    rng = np.random.default_rng(1)
+    add_links = [(str(i), str(j)) for i, j in rng.integers(0, n, (int(edits), 2)) if i != j]
+    remove_links = [(str(i), str(min(corpus[str(i)]))) for i in rng.integers(0, n, int(edits))
+                    if corpus[str(i)]]
+    add_links.append(("new", "0"))
+    add_links.append(("1", "new"))
+    removed = str(n - 1)
+
+    edited = {page: set(links) for page, links in corpus.items() if page != removed}
+    edited["new"] = set()
+    for source, target in add_links:
+        edited[source].add(target)
+    for source, target in remove_links:
+        edited[source].discard(target)
+    for links in edited.values():
+        links.discard(removed)
+
+    start = time.perf_counter()
+    graph = LinkGraph.from_corpus(edited)
+    expected, iterations = power_iteration(graph, pagerank.DAMPING, tolerance)
+    expected = graph.to_dict(expected)
+    print(f"full recompute: {time.perf_counter() - start:.3f} s ({iterations} iterations)")
+
+    for method in ("auto", "push", "power"):
+        ranks = IncrementalPageRank(corpus, pagerank.DAMPING, tolerance)
+        start = time.perf_counter()
+        rounds, iterations = ranks.update(["new"], [removed], add_links, remove_links, method)
+        elapsed = time.perf_counter() - start
+        result = ranks.to_dict()
+        error = sum(abs(result[page] - expected[page]) for page in expected)
+        print(f"{method}: {elapsed:.3f} s ({rounds} push rounds, {iterations} iterations), "
+              f"L1 difference {error:.1e}")
+
+
+@benchmark
+def personalized(pages="100000", vectors="1,16,64,256", single="8"):
+    """
+    Measures personalized PageRank throughput, in vectors per second, of
+    block power iteration over each number of teleport vectors, against
+    solving `single` of them one at a time.
+    """
+    graph = random_graph(int(pages), 8)
+    rng = np.random.default_rng(1)
+
+    def teleports(k):
+        # Each vector prefers a handful of random pages
+        matrix = np.zeros((len(graph), k))
+        for column in range(k):
+            matrix[rng.integers(0, len(graph), 5), column] = 1
+        return matrix
+
+    matrix = teleports(int(single))
+    start = time.perf_counter()
+    for column in range(matrix.shape[1]):
+        block_power_iteration(graph, matrix[:, column], pagerank.DAMPING)
+    elapsed = time.perf_counter() - start
+    print(f"one at a time: {matrix.shape[1] / elapsed:,.1f} vectors/s")
+
+    for k in map(int, vectors.split(",")):
+        stats = IterationStats()
+        block_power_iteration(graph, teleports(k), pagerank.DAMPING, stats=stats)
+        print(f"block of {k}: {k / stats.seconds:,.1f} vectors/s "
+              f"({stats.iterations} iterations)")
+
+
+@benchmark
+def solvers(sizes="10000,100000", degree="8", python_limit="100000"):
+    """
+    Compares the iterations and wall time each solver in SOLVERS takes
+    to reach the default tolerance on the bundled corpora and on
+    power-law graphs of each size, and its L1 distance from a tightly
+    converged reference. Gauss-Seidel sweeps in pure Python, so it only
+    runs up to `python_limit` pages.
+    """
+    graphs = [(directory, LinkGraph.from_corpus(pagerank.crawl(directory)))
+              for directory in CORPORA]
+    graphs += [(f"power law, {n} pages", power_law_graph(n, int(degree)))
+               for n in map(int, sizes.split(","))]
+
+    for label, graph in graphs:
+        expected, _ = power_iteration(graph, pagerank.DAMPING, tolerance=1e-14)
+        print(f"{label}: {len(graph.targets)} links, {len(graph.dangling)} dangling")
+        for method in SOLVERS:
+            if method == "gauss-seidel" and len(graph) > int(python_limit):
+                continue
+            stats = IterationStats()
+            ranks, _ = solve(graph, pagerank.DAMPING, method, stats=stats)
+            print(f"  {method:>13}: {stats.iterations:4} iterations, {stats.seconds:.3f} s, "
+                  f"L1 error {np.abs(ranks - expected).sum():.1e}")
+
+
+@benchmark
+def outofcore(pages="1000000", degree="8", budgets="4,64", corpus_pages="20000"):
+    """
+    Times PageRank over a memory-mapped edge list with each memory budget
+    in MiB, against power iteration in memory, and reports the peak
+    memory traced for each. Also builds an edge list from a synthetic
+    corpus of `corpus_pages` pages within the smallest budget.
+    """
+    smallest = min(map(int, budgets.split(","))) << 20
+    with tempfile.TemporaryDirectory() as directory:
+        graph = random_graph(int(pages), int(degree))
+        save_edges(graph, directory)
+        (expected, _), seconds, peak = measure(power_iteration, graph, pagerank.DAMPING)
+        print(f"in memory: {seconds:.3f} s, {peak / 2 ** 20:.1f} MiB "
+              f"({len(graph.targets) * 4 / 2 ** 20:.1f} MiB of links)")
+        del graph
+
+        with MappedGraph(directory) as mapped:
+            for budget in map(int, budgets.split(",")):
+                (ranks, _), seconds, peak = measure(
+                    mapped_pagerank, mapped, pagerank.DAMPING,
+                    TOLERANCE, MAX_ITERATIONS, budget << 20
+                )
+                print(f"mapped, {budget} MiB budget: {seconds:.3f} s, "
+                      f"{peak / 2 ** 20:.1f} MiB, L1 difference {np.abs(ranks - expected).sum():.1e}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        graph = random_graph(int(corpus_pages), int(degree))
+        write_corpus(graph, directory)
+        edges = os.path.join(directory, "edges")
+        _, seconds, peak = measure(build_edges, directory, edges, 1, None, smallest)
+        with MappedGraph(edges) as mapped:
+            same = np.array_equal(mapped.indptr, crawl_graph(directory, 1).indptr)
+        print(f"build_edges: {seconds:.3f} s, {peak / 2 ** 20:.1f} MiB, "
+              f"{'same' if same else 'different'} degrees as crawl_graph")
+
+
+def measure(function, *args):
+    """
+    Returns the result of `function(*args)`, the seconds it took and the
+    peak bytes it allocated. Allocations are traced in a second run, as
+    tracing would slow down the timed one.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def revision():
+    """
+    Returns the git commit of this checkout, or None outside of one.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@benchmark
+def suite(output="results.json", sizes="1000,10000,100000,1000000", degree="8",
+          generators=",".join(GENERATORS), corpus_limit="100000",
+          python_limit="100000", samples="100000"):
+    """
+    Times each stage of the pagerank pipeline and records its peak
+    memory on graphs from each of `generators` at each size, and writes
+    the results as JSON to `output`.
+
+    Graphs up to `corpus_limit` pages are written as HTML corpora to
+    time `crawl` and `crawl_graph`, and the pure Python
+    `sample_pagerank` and `iterate_pagerank` run up to `python_limit`.
+    """
+    results = {
+        "revision": revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processors": os.cpu_count(),
+        "stages": [],
+    }
+
+    for name in generators.split(","):
+        for n in map(int, sizes.split(",")):
+            label = f"{name}, {n} pages"
+
+            def record(stage, function, *args, **extra):
+                result, seconds, peak = measure(function, *args)
+                results["stages"].append({
+                    "generator": name, "pages": n, "stage": stage,
+                    "seconds": seconds, "peak_bytes": peak, **extra,
+                })
+                print(f"{label}: {stage}: {seconds:.3f} s, {peak / 2 ** 20:.1f} MiB")
+                return result
+
+            graph = record("generate", GENERATORS[name], n, int(degree))
+            ranks = record("power_iteration", power_iteration, graph, pagerank.DAMPING)
+            results["stages"][-1]["iterations"] = ranks[1]
+
+            if n <= int(corpus_limit):
+                with tempfile.TemporaryDirectory() as directory:
+                    record("write_corpus", write_corpus, graph, directory)
+                    record("crawl", pagerank.crawl, directory)
+                    record("crawl_graph", crawl_graph, directory, 1)
+
+            if n <= int(python_limit):
+                corpus = to_corpus(graph)
+                record("sample_pagerank", pagerank.sample_pagerank,
+                       corpus, pagerank.DAMPING, int(samples), samples=int(samples))
+                record("iterate_pagerank", pagerank.iterate_pagerank,
+                       corpus, pagerank.DAMPING)
+
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {len(results['stages'])} results to {output}")
+
+
+@benchmark
+def compare(before, after, threshold="1.2"):
+    """
+    Compares two results files written by `suite`, and lists every stage
+    that took more time or memory in `after` by more than `threshold`
+    times.
+    """
+    def load(path):
+        with open(path) as f:
+            stages = json.load(f)["stages"]
+        return {(stage["generator"], stage["pages"], stage["stage"]): stage
+                for stage in stages}
+
+    before, after = load(before), load(after)
+    regressions = 0
+    for key in sorted(before.keys() & after.keys()):
+        for measure_name in ("seconds", "peak_bytes"):
+            old, new = before[key][measure_name], after[key][measure_name]
+            if old > 0 and new / old > float(threshold):
+                regressions += 1
+                print(f"{key[0]}, {key[1]} pages: {key[2]}: "
+                      f"{measure_name} {old:.4g} -> {new:.4g} ({new / old:.2f}x)")
+    print(f"{regressions} regressions in {len(before.keys() & after.keys())} stages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import multiprocessing
+import os
+import re
+import sys
+import time
+from array import array
+
+from linkgraph import LinkGraph
+
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Bytes of each page read and scanned for links at a time
+BLOCK_SIZE = 1 << 16
+
+# Longest unfinished tag carried over from one block to the next
+MAX_TAG = 1 << 12
+
+# Pages handed to a worker process at a time
+CHUNK_SIZE = 64
+
+
+def main():
+    if not 2 <= len(sys.argv) <= 4:
+        sys.exit("Usage: python crawler.py corpus [edges.npz] [processes]")
+    processes = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    # Imported here, since graphcache itself builds on this module
+    from graphcache import cached_crawl_graph
+    graph = cached_crawl_graph(sys.argv[1], processes, report_progress)
+    print(f"{len(graph)} pages, {len(graph.targets)} links")
+    if len(sys.argv) >= 3:
+        graph.save(sys.argv[2])
+
+
+def crawl_graph(directory, processes=None, progress=None):
+    """
+    Parse a directory of HTML pages into a LinkGraph, like `crawl`.
+
+    Pages are numbered in sorted order of their file names and scanned
+    by `scan`, with the given `processes` and `progress`.
+    """
+    pages = sorted(name for name in os.listdir(directory) if name.endswith(".html"))
+    index = {page: i for i, page in enumerate(pages)}
+    paths = [os.path.join(directory, page) for page in pages]
+
+    sources = array("i")
+    targets = array("i")
+    for source, links in scan(paths, processes, progress):
+        for link in links:
+            target = index.get(link)
+            if target is not None and target != source:
+                sources.append(source)
+                targets.append(target)
+
+    return LinkGraph.from_edges(len(pages), sources, targets, pages)
+
+
+def scan(paths, processes=None, progress=None):
+    """
+    Yields (index, links) pairs for each of `paths`, in any order, where
+    `links` is the set of every link in that page.
+
+    Pages are streamed through a pool of `processes` workers, or one per
+    CPU if None, which scan each file block by block. With a single
+    process the pages are scanned in this one. If given, `progress` is
+    called as `progress(pages, total, seconds)` as pages are done.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    pool = multiprocessing.Pool(processes) if processes > 1 and len(paths) > 1 else None
+
+    start = time.perf_counter()
+    try:
+        if pool is None:
+            scanned = map(page_links, enumerate(paths))
+        else:
+            scanned = pool.imap_unordered(page_links, enumerate(paths), CHUNK_SIZE)
+        for done, result in enumerate(scanned, 1):
+            yield result
+            if progress is not None and (done % 1000 == 0 or done == len(paths)):
+                progress(done, len(paths), time.perf_counter() - start)
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def page_links(task):
+    """
+    Returns a page's index and the set of links in it, reading the
+    file in blocks so that large pages are never held whole.
+    """
+    source, path = task
+    links = set()
+    tail = b""
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(BLOCK_SIZE)
+            text = tail + block
+            end = 0
+            for match in LINK.finditer(text):
+                links.add(match.group(1))
+                end = match.end()
+            if len(block) < BLOCK_SIZE:
+                break
+
+            # Keep a tag still open at the end of the block, which may
+            # continue into the next, unless it is too long to be a link
+            cut = text.rfind(b"<", end)
+            if cut != -1 and text.find(b">", cut) == -1 and len(text) - cut <= MAX_TAG:
+                tail = text[cut:]
+            else:
+                tail = b""
+    return source, {link.decode("utf-8", "replace") for link in links}
+
+
+def report_progress(pages, total, seconds):
+    print(f"  {pages}/{total} pages in {seconds:.1f} s "
+          f"({pages / max(seconds, 1e-9):.0f} pages/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
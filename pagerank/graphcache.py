@@ -0,0 +1,158 @@
+import os
+import zipfile
+
+import numpy as np
+
+from crawler import scan
+from linkgraph import LinkGraph
+
+# Bump VERSION whenever the arrays stored below change
+VERSION = 1
+
+FILENAME = ".linkgraph.npz"
+
+
+def cached_crawl_graph(directory, processes=None, progress=None):
+    """
+    Parse a directory of HTML pages into a LinkGraph, like `crawl_graph`,
+    reusing the graph cached in `directory` by the previous call.
+
+    Pages are fingerprinted by name, modification time and size. Only
+    pages that are new or changed are scanned again, and the cached graph
+    is patched with their links. Every page's raw links are kept, even
+    those to pages outside the corpus, since a page added later may
+    make them valid.
+    """
+    names = []
+    stamps = []
+    with os.scandir(directory) as scanned:
+        for entry in scanned:
+            name = entry.name
+            if name.endswith(".html"):
+                stat = entry.stat()
+                names.append(name)
+                stamps.append((stat.st_mtime_ns, stat.st_size))
+    order = sorted(range(len(names)), key=names.__getitem__)
+    pages = [names[i] for i in order]
+    stamps = np.array(stamps, dtype=np.int64).reshape(-1, 2)[order]
+
+    cache = load_cache(directory)
+    if cache is not None and cache["pages"] == pages and np.array_equal(cache["stamps"], stamps):
+        return LinkGraph(pages, cache["indptr"], cache["targets"])
+
+    names, raw_indptr, raw_targets = patch_links(
+        directory, pages, stamps, cache, processes, progress
+    )
+    graph = resolve_links(pages, names, raw_indptr, raw_targets)
+    save_cache(directory, {
+        "names": names,
+        "pages": pages,
+        "stamps": stamps,
+        "raw_indptr": raw_indptr,
+        "raw_targets": raw_targets,
+        "indptr": graph.indptr,
+        "targets": graph.targets,
+    })
+    return graph
+
+
+def patch_links(directory, pages, stamps, cache, processes, progress):
+    """
+    Returns the table of link names and the raw link CSR arrays for
+    `pages`, taking unchanged pages' links from `cache` and scanning
+    the rest.
+    """
+    if cache is None:
+        names, old = [], {}
+    else:
+        names = cache["names"].tolist()
+        old = {page: i for i, page in enumerate(cache["pages"])}
+    name_ids = {name: i for i, name in enumerate(names)}
+
+    changed = [
+        i for i, page in enumerate(pages)
+        if page not in old or not np.array_equal(cache["stamps"][old[page]], stamps[i])
+    ]
+    paths = [os.path.join(directory, pages[i]) for i in changed]
+    scanned = {changed[j]: links for j, links in scan(paths, processes, progress)}
+
+    segments = []
+    for i, page in enumerate(pages):
+        if i in scanned:
+            ids = []
+            for link in sorted(scanned[i]):
+                if link not in name_ids:
+                    name_ids[link] = len(names)
+                    names.append(link)
+                ids.append(name_ids[link])
+            segments.append(np.array(ids, dtype=np.int64))
+        else:
+            j = old[page]
+            segments.append(cache["raw_targets"][cache["raw_indptr"][j]:cache["raw_indptr"][j + 1]])
+
+    raw_indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+    np.cumsum([len(segment) for segment in segments], out=raw_indptr[1:])
+    raw_targets = np.concatenate(segments) if segments else np.zeros(0, dtype=np.int64)
+    return names, raw_indptr, raw_targets
+
+
+def resolve_links(pages, names, raw_indptr, raw_targets):
+    """
+    Returns the LinkGraph of `pages` keeping only raw links to other
+    pages in the corpus.
+    """
+    page_ids = np.full(len(names), -1, dtype=np.int64)
+    index = {page: i for i, page in enumerate(pages)}
+    for name_id, name in enumerate(names):
+        page_ids[name_id] = index.get(name, -1)
+
+    sources = np.repeat(np.arange(len(pages)), np.diff(raw_indptr))
+    targets = page_ids[raw_targets]
+    keep = (targets >= 0) & (targets != sources)
+    return LinkGraph.from_edges(len(pages), sources[keep], targets[keep], pages)
+
+
+def load_cache(directory):
+    """
+    Returns the cached arrays of `directory`, or None if there are none
+    or they were written by another version.
+    """
+    try:
+        with np.load(os.path.join(directory, FILENAME), allow_pickle=False) as data:
+            if data["version"] != VERSION:
+                return None
+            cache = {key: data[key] for key in data.files}
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        return None
+    cache["pages"] = cache["names"][cache["pages"]].tolist()
+    return cache
+
+
+def save_cache(directory, cache):
+    """
+    Write `cache` atomically to `directory`, ignoring read-only corpora.
+    """
+    names = cache["names"]
+    name_ids = {name: i for i, name in enumerate(names)}
+    for page in cache["pages"]:
+        if page not in name_ids:
+            name_ids[page] = len(names)
+            names.append(page)
+
+    path = os.path.join(directory, FILENAME)
+    temporary = f"{path}.{os.getpid()}.tmp.npz"
+    try:
+        np.savez(
+            temporary,
+            version=VERSION,
+            names=np.array(names, dtype=str),
+            pages=np.array([name_ids[page] for page in cache["pages"]], dtype=np.int64),
+            stamps=cache["stamps"],
+            raw_indptr=cache["raw_indptr"],
+            raw_targets=cache["raw_targets"],
+            indptr=cache["indptr"],
+            targets=cache["targets"],
+        )
+        os.replace(temporary, path)
+    except OSError:
+        pass
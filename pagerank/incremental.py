@@ -0,0 +1,217 @@
+import numpy as np
+
+from linkgraph import LinkGraph
+from solvers import TOLERANCE, power_iteration
+
+# Pushing costs more per link than a power iteration does, so "auto"
+# updates stop pushing after following this share of all links once
+PUSH_BUDGET = 1 / 16
+
+
+class IncrementalPageRank():
+    """
+    PageRank of a corpus, kept up to date as pages and links are added
+    or removed instead of being recomputed from the uniform start.
+
+    Ranks are held unnormalized, as the solution `values` of
+    `(I - d A) values = 1`, where `A` spreads each page's value evenly
+    over its links and drops the value of pages with no links. Jumping
+    anywhere from those pages adds the same amount to every page, which
+    only scales the solution, so normalizing `values` gives PageRank.
+
+    `residuals` is `1 - (I - d A) values`, and is kept up to date too.
+    Changing a page's links only changes the residuals of the pages it
+    linked to before or links to now, so after an edit the correction is
+    pushed out from those pages alone, as in the Gauss-Southwell method.
+    """
+
+    def __init__(self, corpus, damping_factor, tolerance=TOLERANCE):
+        self.damping_factor = damping_factor
+        self.tolerance = tolerance
+        self.graph = LinkGraph.from_corpus(corpus)
+        ranks, self.iterations = power_iteration(self.graph, damping_factor, tolerance)
+        self.reset(ranks)
+
+    def reset(self, ranks):
+        """
+        Set `values` from normalized PageRank `ranks` of the current graph.
+        """
+        graph = self.graph
+        d = self.damping_factor
+        scale = (1 - d + d * ranks[graph.dangling].sum()) / len(graph)
+        self.values = ranks / scale
+        self.residuals = 1 - self.values + d * flow(graph, self.values)
+
+    @property
+    def ranks(self):
+        """
+        Array of PageRank values, in the order of `graph.pages`.
+        """
+        return self.values / self.values.sum()
+
+    def to_dict(self):
+        return self.graph.to_dict(self.ranks)
+
+    def update(self, add_pages=(), remove_pages=(), add_links=(),
+               remove_links=(), method="auto"):
+        """
+        Apply edits to the corpus and bring the ranks up to date.
+
+        Links are (source, target) pairs of page names. Links from or to
+        pages outside the corpus are ignored, as in `crawl`.
+
+        With `method` "push", residuals are pushed out from the edited
+        pages until the ranks are within tolerance. With "power", power
+        iteration restarts from the previous ranks instead. "auto" pushes
+        within `PUSH_BUDGET`, and if the correction spreads further than
+        that, carries on with power iteration from the pushed ranks.
+        Returns the number of push rounds and of power iterations taken.
+        """
+        if method not in ("auto", "push", "power"):
+            raise ValueError(f"unknown method {method!r}")
+        old = self.graph
+        removed = set(remove_pages) & set(old.index)
+        added = [page for page in dict.fromkeys(add_pages) if page not in old.index]
+
+        # Pages keep their order, with removed ones dropped and new
+        # ones appended
+        kept = np.ones(len(old), dtype=bool)
+        kept[[old.index[page] for page in removed]] = False
+        moved = np.where(kept, np.cumsum(kept) - 1, -1)
+        pages = [page for page in old.pages if page not in removed] + added
+        appended = {page: len(pages) - len(added) + i for i, page in enumerate(added)}
+
+        def position(page):
+            i = old.index.get(page)
+            return appended.get(page, -1) if i is None else moved[i]
+
+        # New link sets of every page whose links change, including
+        # pages that linked to removed ones
+        links = {}
+
+        def edit(page):
+            if page not in links:
+                i = old.index.get(page)
+                links[page] = set() if i is None else {old.pages[j] for j in old.links(i)}
+            return links[page]
+
+        for page in added:
+            edit(page)
+        removed_ids = np.flatnonzero(~kept)
+        for i in np.unique(old.sources[np.isin(old.targets, removed_ids)]):
+            edit(old.pages[i])
+        for source, target in add_links:
+            if position(source) >= 0:
+                edit(source).add(target)
+        for source, target in remove_links:
+            if position(source) >= 0:
+                edit(source).discard(target)
+        links = {page: page_links for page, page_links in links.items() if position(page) >= 0}
+
+        # Old links of unchanged pages carry over, renumbered
+        changed_old = np.zeros(len(old), dtype=bool)
+        changed_old[[old.index[page] for page in links if page in old.index]] = True
+        changed_old[removed_ids] = True
+        keep = ~changed_old[old.sources]
+        sources = [moved[old.sources[keep]]]
+        targets = [moved[old.targets[keep]]]
+        for page, page_links in links.items():
+            source = position(page)
+            ids = [i for i in map(position, page_links) if i >= 0 and i != source]
+            sources.append(np.full(len(ids), source, dtype=np.int64))
+            targets.append(np.array(ids, dtype=np.int64))
+        graph = LinkGraph.from_edges(
+            len(pages), np.concatenate(sources), np.concatenate(targets), pages
+        )
+
+        # Carry values and residuals over, with new pages at 0 and
+        # therefore a residual of 1, then account for the changed links
+        d = self.damping_factor
+        values = np.zeros(len(pages))
+        values[moved[kept]] = self.values[kept]
+        residuals = np.ones(len(pages))
+        residuals[moved[kept]] = self.residuals[kept]
+
+        changed = np.zeros(len(pages), dtype=bool)
+        changed[[position(page) for page in links]] = True
+        before = changed_old[old.sources] & (moved[old.targets] >= 0)
+        np.add.at(residuals, moved[old.targets[before]],
+                  -d * self.values[old.sources[before]] / old.out_degree[old.sources[before]])
+        after = changed[graph.sources]
+        np.add.at(residuals, graph.targets[after],
+                  d * values[graph.sources[after]] / graph.out_degree[graph.sources[after]])
+
+        self.graph, self.values, self.residuals = graph, values, residuals
+        self.rounds = self.iterations = 0
+        if method != "power":
+            touched = np.concatenate((
+                np.flatnonzero(changed),
+                moved[old.targets[before]],
+                graph.targets[after],
+            ))
+            budget = len(graph.targets) * PUSH_BUDGET if method == "auto" else None
+            self.rounds, finished = push(graph, values, residuals, d, self.threshold(),
+                                         np.unique(touched), budget)
+            if finished:
+                return self.rounds, self.iterations
+        ranks, self.iterations = power_iteration(graph, d, self.tolerance, initial=self.ranks)
+        self.reset(ranks)
+        return self.rounds, self.iterations
+
+    def threshold(self):
+        """
+        Returns the residual below which a page is not pushed, such that
+        the ranks are then within `tolerance` in L1 norm.
+        """
+        d = self.damping_factor
+        return self.tolerance * (1 - d) * self.values.sum() / len(self.graph)
+
+
+def flow(graph, values):
+    """
+    Returns `A values`: what each page receives from the pages linking
+    to it, each passing on its value split evenly among its links.
+    """
+    return np.bincount(
+        graph.targets,
+        weights=values[graph.sources] / graph.out_degree[graph.sources],
+        minlength=len(graph),
+    )
+
+
+def push(graph, values, residuals, damping_factor, threshold, pages, budget=None):
+    """
+    Push the residuals of `pages`, and of every page they reach in turn,
+    into `values` until no residual exceeds `threshold`, updating both
+    arrays in place.
+
+    Each round pushes every page above the threshold at once: its
+    residual moves into its value, and `damping_factor` of it is split
+    among the residuals of its links. Only pages whose residuals just
+    changed are checked in the next round. Pushing stops early once it
+    has followed more than `budget` links in all, if given. Returns
+    the number of rounds and whether the residuals are all below the
+    threshold.
+    """
+    rounds = 0
+    followed = 0
+    active = pages[np.abs(residuals[pages]) > threshold]
+    while len(active):
+        if budget is not None and followed > budget:
+            return rounds, False
+        rounds += 1
+        mass = residuals[active]
+        values[active] += mass
+        residuals[active] = 0
+
+        degree = graph.out_degree[active]
+        ends = np.cumsum(degree)
+        edges = np.arange(ends[-1]) + np.repeat(graph.indptr[active] - ends + degree, degree)
+        followed += len(edges)
+        reached = graph.targets[edges]
+        np.add.at(residuals, reached,
+                  np.repeat(damping_factor * mass / np.maximum(degree, 1), degree))
+
+        reached = np.unique(reached)
+        active = reached[np.abs(residuals[reached]) > threshold]
+    return rounds, True
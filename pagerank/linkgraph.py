@@ -0,0 +1,84 @@
+import numpy as np
+
+
+class LinkGraph():
+    """
+    Link graph of a corpus in CSR form.
+
+    Pages are numbered by their position in `pages`, and the links of page
+    `i` are `targets[indptr[i]:indptr[i + 1]]`. `sources` repeats each
+    page once per link, so `(sources, targets)` is also the edge list.
+    """
+
+    def __init__(self, pages, indptr, targets):
+        self.pages = list(pages)
+        self.index = {page: i for i, page in enumerate(self.pages)}
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int32)
+
+        self.out_degree = np.diff(self.indptr)
+        self.sources = np.repeat(
+            np.arange(len(self.pages), dtype=np.int32), self.out_degree
+        )
+        self.dangling = np.flatnonzero(self.out_degree == 0)
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build a LinkGraph from a corpus dictionary as returned by `crawl`.
+        Links to pages outside the corpus are ignored.
+        """
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        indptr = [0]
+        targets = []
+        for page in pages:
+            links = sorted(index[link] for link in set(corpus[page]) if link in index)
+            targets.extend(links)
+            indptr.append(len(targets))
+        return cls(pages, indptr, targets)
+
+    @classmethod
+    def from_edges(cls, n, sources, targets, pages=None):
+        """
+        Build a LinkGraph over pages `0..n-1` from parallel arrays of
+        link sources and targets. Duplicate links are kept only once.
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        keys = np.sort(sources * n + targets)
+        keys = keys[np.diff(keys, prepend=-1) != 0]
+        sources, targets = np.divmod(keys, n)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+        return cls(range(n) if pages is None else pages, indptr, targets)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a LinkGraph written by `save`.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["pages"].tolist(), data["indptr"], data["targets"])
+
+    def save(self, path):
+        """
+        Write the page names and CSR arrays to a `.npz` file.
+        """
+        np.savez(path, pages=np.array(self.pages, dtype=str),
+                 indptr=self.indptr, targets=self.targets)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def links(self, page):
+        """
+        Returns the indices of the pages linked to by page index `page`.
+        """
+        return self.targets[self.indptr[page]:self.indptr[page + 1]]
+
+    def to_dict(self, ranks):
+        """
+        Returns a dictionary mapping page names to their value in `ranks`.
+        """
+        return {page: float(rank) for page, rank in zip(self.pages, ranks)}
@@ -0,0 +1,242 @@
+import mmap
+import os
+import sys
+import tempfile
+import time
+from array import array
+
+import numpy as np
+
+from crawler import report_progress, scan
+from solvers import MAX_ITERATIONS, TOLERANCE
+
+# Bytes of memory the edges may take up at a time, on top of the arrays
+# of one value per page
+MEMORY_BUDGET = 1 << 26
+
+# Bytes of block arrays held per link while iterating: its target, its
+# source, and the rank it passes on
+BYTES_PER_LINK = 4 + 8 + 8 + 8
+
+# Bytes held per link while sorting scanned links by source: the pair
+# itself, its sort order, the sorted copy and its offset
+BYTES_PER_PAIR = 8 + 8 + 8 + 8 + 8
+
+PAGES = "pages.npy"
+INDPTR = "indptr.npy"
+TARGETS = "targets.npy"
+
+
+def main():
+    if not 3 <= len(sys.argv) <= 4:
+        sys.exit("Usage: python outofcore.py corpus edges [memory MiB]")
+    memory = int(sys.argv[3]) << 20 if len(sys.argv) == 4 else MEMORY_BUDGET
+    build_edges(sys.argv[1], sys.argv[2], memory=memory, progress=report_progress)
+    with MappedGraph(sys.argv[2]) as graph:
+        ranks, iterations = mapped_pagerank(graph, 0.85, memory=memory)
+        print(f"{len(graph)} pages, {graph.links} links, {iterations} iterations")
+        for i in np.argsort(ranks)[::-1][:10]:
+            print(f"  {graph.pages[i]}: {ranks[i]:.4f}")
+
+
+def build_edges(directory, output, processes=None, progress=None, memory=MEMORY_BUDGET):
+    """
+    Parse a directory of HTML pages, like `crawl_graph`, into an edge
+    list in `output` that `MappedGraph` opens without loading it.
+
+    Links are written as they are scanned to a scratch file of (source,
+    target) pairs, then moved in blocks of at most `memory` bytes to
+    their place in a target array sorted by source.
+    """
+    pages = sorted(name for name in os.listdir(directory) if name.endswith(".html"))
+    index = {page: i for i, page in enumerate(pages)}
+    paths = [os.path.join(directory, page) for page in pages]
+    os.makedirs(output, exist_ok=True)
+    np.save(os.path.join(output, PAGES), np.array(pages, dtype=str))
+
+    degree = np.zeros(len(pages), dtype=np.int64)
+    block = max(memory // BYTES_PER_PAIR, 1)
+    with tempfile.TemporaryFile(dir=output) as scratch:
+        sources = array("i")
+        targets = array("i")
+        for source, links in scan(paths, processes, progress):
+            for link in links:
+                target = index.get(link)
+                if target is not None and target != source:
+                    sources.append(source)
+                    targets.append(target)
+            if len(sources) >= block:
+                degree += write_pairs(scratch, sources, targets, len(pages))
+                sources = array("i")
+                targets = array("i")
+        degree += write_pairs(scratch, sources, targets, len(pages))
+
+        indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+        np.cumsum(degree, out=indptr[1:])
+        np.save(os.path.join(output, INDPTR), indptr)
+        if indptr[-1] == 0:
+            np.save(os.path.join(output, TARGETS), np.zeros(0, dtype=np.int32))
+            return
+        mapped = np.lib.format.open_memmap(
+            os.path.join(output, TARGETS), mode="w+", dtype=np.int32, shape=(int(indptr[-1]),)
+        )
+
+        # Next free position in `mapped` for the links of each page
+        filled = indptr[:-1].copy()
+        scratch.seek(0)
+        while True:
+            chunk = np.fromfile(scratch, dtype=np.int32, count=2 * block).reshape(-1, 2)
+            if not len(chunk):
+                break
+            order = np.argsort(chunk[:, 0], kind="stable")
+            sources, targets = chunk[order, 0], chunk[order, 1]
+            first = np.flatnonzero(np.diff(sources, prepend=-1) != 0)
+            counts = np.diff(np.append(first, len(sources)))
+            offsets = np.arange(len(sources)) - np.repeat(first, counts)
+            mapped[filled[sources] + offsets] = targets
+            filled[sources[first]] += counts
+            mapped.flush()
+        del mapped
+
+
+def write_pairs(scratch, sources, targets, n):
+    """
+    Append (source, target) pairs to `scratch` from parallel arrays, and
+    return the number written for each of the `n` pages.
+    """
+    sources = np.frombuffer(sources, dtype=np.int32)
+    targets = np.frombuffer(targets, dtype=np.int32)
+    np.column_stack((sources, targets)).tofile(scratch)
+    return np.bincount(sources, minlength=n)
+
+
+def save_edges(graph, output):
+    """
+    Write a LinkGraph to `output` in the layout written by `build_edges`.
+    """
+    os.makedirs(output, exist_ok=True)
+    np.save(os.path.join(output, PAGES), np.array(graph.pages, dtype=str))
+    np.save(os.path.join(output, INDPTR), graph.indptr)
+    np.save(os.path.join(output, TARGETS), graph.targets)
+
+
+class MappedGraph():
+    """
+    Link graph in CSR form, like LinkGraph, whose target array stays in
+    its file and is only mapped into memory.
+
+    `indptr` and `out_degree` are loaded, since each holds a value per
+    page, as are the page names, on first use.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.indptr = np.load(os.path.join(directory, INDPTR))
+        self.out_degree = np.diff(self.indptr)
+        self.dangling = np.flatnonzero(self.out_degree == 0)
+        self.links = int(self.indptr[-1])
+        self._pages = None
+
+        with open(os.path.join(directory, TARGETS), "rb") as f:
+            if np.lib.format.read_magic(f) == (1, 0):
+                shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+            offset = f.tell()
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.links else None
+        self.offset = offset
+        self.targets = (
+            np.frombuffer(self.map, dtype=dtype, count=shape[0], offset=offset)
+            if self.links else np.zeros(0, dtype=np.int32)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.out_degree)
+
+    @property
+    def pages(self):
+        if self._pages is None:
+            self._pages = np.load(os.path.join(self.directory, PAGES)).tolist()
+        return self._pages
+
+    def close(self):
+        self.targets = None
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+    def release(self, start, stop):
+        """
+        Tell the kernel that targets `start:stop` are not needed for now,
+        so that their pages leave this process's resident memory.
+        """
+        if self.map is None or not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        itemsize = self.targets.itemsize
+        first = (self.offset + start * itemsize) // mmap.PAGESIZE * mmap.PAGESIZE
+        last = self.offset + stop * itemsize
+        self.map.madvise(mmap.MADV_DONTNEED, first, last - first)
+
+    def blocks(self, size):
+        """
+        Yields (sources, targets) arrays for consecutive blocks of at
+        most `size` links, in order of source.
+        """
+        for start in range(0, self.links, size):
+            stop = min(start + size, self.links)
+            first = np.searchsorted(self.indptr, start, side="right") - 1
+            last = np.searchsorted(self.indptr, stop, side="left")
+            counts = np.diff(np.clip(self.indptr[first:last + 1], start, stop))
+            sources = np.repeat(np.arange(first, last), counts)
+            targets = np.array(self.targets[start:stop])
+            self.release(start, stop)
+            yield sources, targets
+
+
+def mapped_pagerank(graph, damping_factor, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS, memory=MEMORY_BUDGET, stats=None):
+    """
+    Return the PageRank vector of a MappedGraph, and the number of
+    iterations taken, by power iteration like `power_iteration`.
+
+    Each iteration streams over the links in blocks sized so that they
+    take up at most `memory` bytes, so only arrays with a value per page
+    stay in memory. If `stats` is an IterationStats, the L1 changes are
+    recorded in it.
+    """
+    start = time.perf_counter()
+    n = len(graph)
+    size = max(memory // BYTES_PER_LINK, 1)
+    ranks = np.full(n, 1 / n)
+    with np.errstate(divide="ignore"):
+        share = np.where(graph.out_degree > 0, 1 / graph.out_degree, 0)
+
+    for iteration in range(1, max_iterations + 1):
+        passed = ranks * share
+        linked = np.zeros(n)
+        for sources, targets in graph.blocks(size):
+            linked += np.bincount(targets, weights=passed[sources], minlength=n)
+        dangling = ranks[graph.dangling].sum()
+        new_ranks = (1 - damping_factor) / n + damping_factor * (linked + dangling / n)
+
+        change = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if stats is not None:
+            stats.residuals.append(change)
+        if change < tolerance:
+            break
+
+    if stats is not None:
+        stats.iterations = iteration
+        stats.seconds = time.perf_counter() - start
+    return ranks, iteration
+
+
+if __name__ == "__main__":
+    main()
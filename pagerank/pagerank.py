@@ -2,8 +2,12 @@ import os
 import random
 import re
 import sys
+import time
 import numpy as np
 
+from linkgraph import LinkGraph
+from solvers import block_power_iteration, solve
+
 DAMPING = 0.85
 SAMPLES = 10000
 
@@ -80,21 +84,29 @@ def sample_pagerank(corpus, damping_factor, n):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    pagerank = {ipage: 0 for ipage in corpus}  # Initialize counter for each page
-    curr_page = random.sample(corpus.keys(), 1)[0]  # Initial page
-
-    pages = sorted(list(corpus.keys()))  # Get ordered list of keys
-
+    pages = sorted(corpus)  # Get ordered list of keys
+    index = {page: i for i, page in enumerate(pages)}
+    links = [tuple(index[link] for link in sorted(corpus[page])) for page in pages]
+    counts = [0] * len(pages)  # Initialize counter for each page
+
+    # Draw each step in two stages, which is the same distribution as
+    # transition_model: follow a random link with probability
+    # `damping_factor`, unless there are none, otherwise jump anywhere
+    rand, choice, randrange = random.random, random.choice, random.randrange
+    total = len(pages)
+    curr_page = randrange(total)  # Initial page
     for _ in range(n):
-        distribution = transition_model(corpus, curr_page, damping_factor)
-        weights = [distribution[page] for page in pages]  # Get ordered list of weights
-        curr_page = random.choices(population=pages, weights=weights)[0]
-        pagerank[curr_page] += 1 / n  # Normalize continuously
+        page_links = links[curr_page]
+        if page_links and rand() < damping_factor:
+            curr_page = choice(page_links)
+        else:
+            curr_page = randrange(total)
+        counts[curr_page] += 1
 
-    return pagerank
+    return {page: count / n for page, count in zip(pages, counts)}
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, stats=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -102,31 +114,96 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    Pages with no links are treated as linking to every page, but
+    `corpus` is left unchanged: their rank is kept as a running total
+    that every page receives a share of. If `stats` is an IterationStats,
+    the convergence of the iteration is recorded in it.
     """
     convergence = 0.0001
     n = len(corpus)
+    start = time.perf_counter()
 
-    # Handle pages with no links
-    for page, links in corpus.items():
-        if len(links) == 0:
-            corpus[page] = list(corpus.keys())
-
-    pagerank = {page: 1 / n for page in corpus}  # Initialize scores
+    pages = list(corpus)
+    index = {page: i for i, page in enumerate(pages)}
     refs = get_references(corpus)
 
-    scores = np.array(list(pagerank.values()))
+    # Pages linking to each page, with the share of their rank that
+    # they pass along each link
+    inbound = [
+        [(index[ref], 1 / len(corpus[ref])) for ref in refs[page]]
+        for page in pages
+    ]
+    dangling = [len(corpus[page]) == 0 for page in pages]
+
+    ranks = [1 / n] * n  # Initialize scores
+    dangling_sum = sum(rank for rank, empty in zip(ranks, dangling) if empty)
+    iterations = 0
     while True:
-        for page in corpus:
-            this_sum = 0
-            for ref in refs[page]:
-                this_sum += pagerank[ref] / len(corpus[ref])
-            pagerank[page] = (1 - damping_factor) / n + damping_factor * this_sum
-
-        new_scores = np.array(list(pagerank.values()))
-        if (abs((scores - new_scores)/scores) < convergence).all():
-            return pagerank
-        else:
-            scores = new_scores
+        iterations += 1
+        change = 0
+        for i in range(n):
+            this_sum = dangling_sum / n
+            for ref, share in inbound[i]:
+                this_sum += ranks[ref] * share
+            rank = (1 - damping_factor) / n + damping_factor * this_sum
+            change = max(change, abs(rank - ranks[i]) / ranks[i])
+            if dangling[i]:
+                dangling_sum += rank - ranks[i]
+            ranks[i] = rank
+
+        if stats is not None:
+            stats.residuals.append(change)
+        if change < convergence:
+            break
+
+    if stats is not None:
+        stats.iterations = iterations
+        stats.seconds = time.perf_counter() - start
+    return dict(zip(pages, ranks))
+
+
+def vectorized_pagerank(corpus, damping_factor, method="jacobi"):
+    """
+    Return PageRank values for each page by iterating over a sparse
+    transition matrix built once from `corpus`, with the solver named
+    `method` in `solvers.SOLVERS`.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    ranks, _ = solve(graph, damping_factor, method)
+    return graph.to_dict(ranks)
+
+
+def personalized_pagerank(corpus, damping_factor, preferences):
+    """
+    Return personalized PageRank values for each of `preferences`, where
+    the random surfer jumps only to preferred pages instead of anywhere.
+    Each preference is a set of pages, jumped to uniformly, or a
+    dictionary mapping pages to weights. All are solved together.
+    ValueError is raised for pages not in the corpus, and for
+    preferences with negative weights or none.
+
+    Return a list with one dictionary per preference, where keys are
+    page names, and values are their PageRank value. All PageRank values
+    of a dictionary sum to 1.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    teleports = np.zeros((len(graph), len(preferences)))
+    for column, preference in enumerate(preferences):
+        if not isinstance(preference, dict):
+            preference = dict.fromkeys(preference, 1)
+        missing = [page for page in preference if page not in graph.index]
+        if missing:
+            raise ValueError(f"preference {column} has pages not in the corpus: "
+                             f"{', '.join(map(str, missing))}")
+        for page, weight in preference.items():
+            teleports[graph.index[page], column] = weight
+    ranks, _ = block_power_iteration(graph, teleports, damping_factor)
+    return [graph.to_dict(column) for column in ranks.T]
 
 
 def get_references(corpus):
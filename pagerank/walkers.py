@@ -0,0 +1,141 @@
+import math
+import multiprocessing
+
+import numpy as np
+
+from linkgraph import LinkGraph
+
+WALKERS = 4096
+BATCHES = 8
+
+# Surfers start at uniformly random pages, so each batch first takes
+# enough unrecorded steps for that start to weigh less than this
+BURN_IN = 1e-6
+
+# Two-sided 95% normal quantile, for confidence intervals over batches
+Z = 1.96
+
+# LinkGraph shared by the walks in a worker process
+graph = None
+
+
+def multiwalker_pagerank(corpus, damping_factor, n, walkers=WALKERS,
+                         batches=BATCHES, processes=0, seed=None):
+    """
+    Return PageRank estimates for each page from `n` samples taken by
+    many independent random surfers at once, and the half-width of a
+    95% confidence interval around each estimate.
+
+    Both are dictionaries keyed by page name. The estimates sum to 1.
+    See `walk_batches` for the other arguments.
+    """
+    links = LinkGraph.from_corpus(corpus)
+    estimates, intervals = walk_batches(
+        links, damping_factor, n, walkers, batches, processes, seed
+    )
+    return links.to_dict(estimates), links.to_dict(intervals)
+
+
+def walk_batches(links, damping_factor, n, walkers=WALKERS, batches=BATCHES,
+                 processes=0, seed=None):
+    """
+    Split `n` samples evenly over `batches` independent batches of up to
+    `walkers` surfers each, with independent seeds spawned from `seed`,
+    and return the mean of their estimates and a 95% confidence
+    half-width per page.
+
+    Batches get fewer surfers when they take few samples, so that their
+    burn-in takes no more steps than they record. There are at most `n`
+    batches.
+
+    Batches run in the calling process if `processes` is 0, and otherwise
+    on a pool of that many processes, or of one per CPU if it is None.
+    """
+    if n < 1:
+        raise ValueError("at least one sample is needed")
+    batches = min(batches, n)
+    seeds = np.random.SeedSequence(seed).spawn(batches)
+    burn_in = burn_in_steps(damping_factor)
+    tasks = []
+    for i, batch_seed in enumerate(seeds):
+        samples = n // batches + (i < n % batches)
+        batch_walkers = max(min(walkers, samples // max(burn_in, 1)), 1)
+        tasks.append((damping_factor, batch_walkers, samples, burn_in, batch_seed))
+
+    if processes == 0:
+        results = [walk(links, *task) for task in tasks]
+    else:
+        with multiprocessing.Pool(processes, initializer=share, initargs=(links,)) as pool:
+            results = pool.starmap(walk_shared, tasks)
+
+    results = np.array(results)
+    estimates = results.mean(axis=0)
+    if batches > 1:
+        intervals = Z * results.std(axis=0, ddof=1) / np.sqrt(batches)
+    else:
+        intervals = np.full(len(links), np.inf)
+    return estimates, intervals
+
+
+def walk(links, damping_factor, walkers, samples, burn_in, seed):
+    """
+    Advance `walkers` random surfers, starting at random pages, by
+    `burn_in` steps and then until they have made `samples` visits
+    together, and return the fraction of those visits that each page
+    received. The last step only counts as many surfers as needed.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(links)
+    counts = np.zeros(n, dtype=np.int64)
+    positions = rng.integers(0, n, walkers)
+    steps = -(-samples // walkers)
+
+    # Visits are buffered so that each bincount over all pages
+    # covers at least as many visits as there are pages
+    rows = min(steps, -(-n // walkers))
+    visits = np.empty((rows, walkers), dtype=np.int64)
+
+    for step in range(-burn_in, steps):
+        degree = links.out_degree[positions]
+        following = np.flatnonzero(
+            (rng.random(walkers) < damping_factor) & (degree > 0)
+        )
+
+        # Jump anywhere, except for surfers following a uniformly
+        # chosen link, read straight from the CSR arrays
+        next_positions = rng.integers(0, n, walkers)
+        choice = (rng.random(len(following)) * degree[following]).astype(np.int64)
+        next_positions[following] = links.targets[
+            links.indptr[positions[following]] + choice
+        ]
+        positions = next_positions
+        if step < 0:
+            continue
+
+        visits[step % rows] = positions
+        if step % rows == rows - 1 or step == steps - 1:
+            recorded = visits[:step % rows + 1].ravel()
+            if step == steps - 1:
+                recorded = recorded[:len(recorded) - (steps * walkers - samples)]
+            counts += np.bincount(recorded, minlength=n)
+
+    return counts / samples
+
+
+def burn_in_steps(damping_factor):
+    """
+    Returns the number of steps after which the uniform start is
+    damped by `BURN_IN`.
+    """
+    if not 0 < damping_factor < 1:
+        return 0
+    return math.ceil(math.log(BURN_IN) / math.log(damping_factor))
+
+
+def share(links):
+    global graph
+    graph = links
+
+
+def walk_shared(*args):
+    return walk(graph, *args)